@@ -1,28 +1,46 @@
 import os
 import io
 import re
-import json
-import docx
-import PyPDF2
 import time
 import requests
+import tempfile
 import streamlit as st
-import google.generativeai as genai
 
+from collections import OrderedDict, Counter
 from dotenv import load_dotenv
-from pymongo import MongoClient
 from datetime import datetime, timedelta
 from bson import ObjectId
 
+# Gemini AI yapılandırması evaluator modülünde yapılır
+from evaluator import (
+    evaluate_essay, evaluate_essay_stream, evaluate_essays_packed, is_packable, grade_converter, parse_stats,
+    compile_rubric_prompt, MODEL_NAME,
+    PACKING_MAX_WORDS, PACKING_BATCH_SIZE, PACKING_BATCH_LIMIT
+)
+from batch_grading import grade_packed_batch, DEFAULT_MAX_WORKERS, MAX_WORKERS_LIMIT
+from evaluation_cache import EvaluationCache, evaluate_with_cache, evaluate_many_with_cache
+from single_flight import EvaluationLease, EVALUATION_LEASE_ENABLED
+from mongo_client import get_db, pool_stats
+from gemini_client import limiter_stats
+from token_budget import estimate_batch, estimate_tokens
+from evaluation_writer import EvaluationWriter, build_evaluation_data
+from job_queue import enqueue_grading_batch, get_batch_jobs, STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED
+from db_indexes import ensure_indexes
+from report_queries import (
+    get_rubric_usage_stats, get_rubric_score_summary, get_criterion_stats,
+    get_recent_evaluations, get_student_evaluations, get_student_page, get_student_stats
+)
+from essay_store import load_essay_text
+from export_engine import export_evaluations
+from report_stats import get_report_summary, get_rubric_summaries, get_score_trend, ensure_report_stats
+from text_extraction import extract_text, file_digest, file_extension, ExtractionLimitError
+
 
-# Gemini AI konfigürasyonunu da ekleyin (main() fonksiyonundan önce):
-# Gemini AI yapılandırması
-try:
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    model = genai.GenerativeModel('gemini-2.0-flash')
-except Exception as e:
-    st.error(f"❌ Gemini API yapılandırma hatası: {e}")
+# Bu boyuta kadar export dosyaları bellekte, üzerindekiler diskte tutulur
+EXPORT_SPOOL_BYTES = int(os.getenv("EXPORT_SPOOL_BYTES", str(8 * 1024 * 1024)))
 
+# Oturum başına saklanacak en fazla çıkarılmış dosya metni
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "64"))
 
 # Sayfa ayarları
 st.set_page_config(
@@ -42,182 +60,49 @@ def init_mongodb():
         st.error("⚠️ MONGO_URI çevresel değişkeni tanımlı değil!")
         raise Exception("MONGO_URI eksik")
     try:
-        client = MongoClient(
-            uri,
-            serverSelectionTimeoutMS=10000,
-            connectTimeoutMS=10000,
-            socketTimeoutMS=10000,
-            maxPoolSize=1
-        )
-        db = client['essay_grader']
+        db = get_db()
         # Bağlantıyı test et
         
         collections = db.list_collection_names()
+        
+        # Rapor sorguları ve toplu yazmalar için gereken indeksler
+        ensure_indexes(db)
+        # Geçmiş değerlendirmeler özetlenmeden artımlı istatistik tutulmaz
+        ensure_report_stats(db)
        
         return db
     except Exception as e:
         
         raise
 
-
-
-def extract_text_from_file(uploaded_file):
-    """Dosyadan metin çıkarma"""
+# Değerlendirme önbelleği (süreç içi LRU + MongoDB)
+@st.cache_resource
+def init_evaluation_cache():
+    db = init_mongodb()
+    lease = EvaluationLease(db.evaluation_leases) if EVALUATION_LEASE_ENABLED else None
+    cache = EvaluationCache(db.evaluation_cache, lease=lease)
     try:
-        file_extension = uploaded_file.name.split('.')[-1].lower()
-        
-        if file_extension == 'txt':
-            return uploaded_file.read().decode('utf-8')
-        
-        elif file_extension == 'pdf':
-            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text
-        
-        elif file_extension in ['doc', 'docx']:
-            doc = docx.Document(uploaded_file)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
-        
-        else:
-            return None
-            
+        cache.ensure_indexes()
+        if lease:
+            lease.ensure_indexes()
     except Exception as e:
-        st.error(f"❌ Dosya okuma hatası: {e}")
-        return None
-
-def evaluate_with_gemini(essay_text, rubric_data):
-    """Gemini AI ile essay değerlendirme"""
-    
-    # Rubrik kriterlerini formatla
-    criteria_text = ""
-    for i, criterion in enumerate(rubric_data['criteria'], 1):
-        criteria_text += f"{i}. {criterion['name']} ({criterion['weight']} puan)\n"
-        criteria_text += f"   Açıklama: {criterion['description']}\n"
-        
-        if criterion.get('levels'):
-            criteria_text += "   Performans Seviyeleri:\n"
-            for level, desc in criterion['levels'].items():
-                if desc:
-                    criteria_text += f"   - {level.title()}: {desc}\n"
-        criteria_text += "\n"
-    
-    prompt = f"""Sen deneyimli bir öğretmensin. Aşağıdaki öğrenci yazısını verilen rubrik kriterlerine göre objektif bir şekilde değerlendir.
-
-RUBRIK BİLGİLERİ:
-- Rubrik Adı: {rubric_data['name']}
-- Ders: {rubric_data.get('subject', 'Genel')}
-- Toplam Puan: {rubric_data['total_points']}
-
-DEĞERLENDIRME KRİTERLERİ:
-{criteria_text}
+        st.warning(f"⚠️ Önbellek indeksi oluşturulamadı: {e}")
+    return cache
 
-ÖĞRENCİ METNİ:
-{essay_text}
 
-DEĞERLENDIRME FORMATI:
-Lütfen aşağıdaki JSON formatında yanıt ver:
-
-{{
-    "criteria_scores": [
-        {{
-            "name": "Kriter Adı",
-            "score": puan_sayısı,
-            "max_score": maksimum_puan,
-            "feedback": "Bu kritere ilişkin detaylı geri bildirim",
-            "level": "mükemmel/iyi/orta/zayıf"
-        }}
-    ],
-    "total_score": toplam_puan,
-    "total_max_score": {rubric_data['total_points']},
-    "percentage": yüzde_değeri,
-    "grade": "harf_notu",
-    "general_feedback": "Genel değerlendirme ve yorumlar",
-    "strengths": ["Güçlü yön 1", "Güçlü yön 2", "Güçlü yön 3"],
-    "improvements": ["Gelişim önerisi 1", "Gelişim önerisi 2", "Gelişim önerisi 3"],
-    "text_statistics": {{
-        "word_count": kelime_sayısı,
-        "sentence_count": cümle_sayısı,
-        "paragraph_count": paragraf_sayısı,
-        "readability": "kolay/orta/zor"
-    }}
-}}
-
-Değerlendirmeni profesyonel, yapıcı ve objektif bir dilde yap. Her kriter için verdiğin puanı gerekçelendir."""
-
-    try:
-        response = model.generate_content(prompt)
-        
-        # JSON'u temizle ve parse et
-        response_text = response.text.strip()
-        
-        # JSON kısmını bul
-        if "```json" in response_text:
-            json_start = response_text.find("```json") + 7
-            json_end = response_text.find("```", json_start)
-            json_text = response_text[json_start:json_end]
-        elif response_text.startswith("{"):
-            json_text = response_text
-        else:
-            # JSON bulunamadıysa, { ile başlayan kısmı bul
-            json_start = response_text.find("{")
-            if json_start != -1:
-                json_text = response_text[json_start:]
-            else:
-                raise ValueError("JSON formatı bulunamadı")
-        
-        # JSON'u parse et
-        evaluation_result = json.loads(json_text)
-        return evaluation_result
-        
-    except json.JSONDecodeError as e:
-        st.error(f"❌ AI yanıtı JSON formatında değil: {e}")
-        return None
-    except Exception as e:
-        st.error(f"❌ AI değerlendirme hatası: {e}")
-        return None
-
-def save_evaluation_to_db(db, evaluation_data):
-    """Değerlendirmeyi veritabanına kaydet"""
-    try:
-        # Tarih objelerini kontrol et ve düzelt
-        if 'assignment_date' in evaluation_data and evaluation_data['assignment_date']:
-            from datetime import datetime, date
-            if isinstance(evaluation_data['assignment_date'], date):
-                # date objesi ise datetime'a çevir
-                evaluation_data['assignment_date'] = datetime.combine(
-                    evaluation_data['assignment_date'], 
-                    datetime.min.time()
-                )
-        
-        # MongoDB'ye kaydet
-        result = db.evaluations.insert_one(evaluation_data)
-        return result.inserted_id
-        
-    except Exception as e:
-        st.error(f"❌ Veritabanına kaydetme hatası: {e}")
-        return None
-
-def grade_converter(percentage):
-    """Yüzdeyi harf notuna çevir"""
-    if percentage >= 90:
-        return "AA"
-    elif percentage >= 85:
-        return "BA"
-    elif percentage >= 75:
-        return "BB"
-    elif percentage >= 65:
-        return "CB"
-    elif percentage >= 55:
-        return "CC"
-    elif percentage >= 45:
-        return "DC"
-    else:
-        return "FF"
+def show_write_report(write_report, results, cached_keys):
+    """Toplu yazma sonucunu dosya bazında kullanıcıya bildir"""
+    for evaluation_data in write_report["inserted"]:
+        results.append(evaluation_data)
+        source = " (önbellekten)" if evaluation_data['idempotency_key'] in cached_keys else ""
+        st.success(f"✅ {evaluation_data['file_name']} değerlendirmesi kaydedildi!{source}")
+    
+    for evaluation_data in write_report["duplicates"]:
+        results.append(evaluation_data)
+        st.info(f"ℹ️ {evaluation_data['file_name']} değerlendirmesi zaten kayıtlı, tekrar yazılmadı.")
+    
+    for evaluation_data, error in write_report["failed"]:
+        st.error(f"❌ {evaluation_data['file_name']} değerlendirmesi kaydedilemedi: {error}")
 
 # show_essay_evaluation fonksiyonunu bu şekilde değiştirin:
 
@@ -291,7 +176,7 @@ def show_essay_evaluation(db):
             with st.expander(f"📄 {i}. {file.name} ({file.size/1024:.1f} KB)", expanded=False):
                 
                 # Dosya önizlemesi
-                text_content = extract_text_from_file(file)
+                text_content = get_extracted_text(file)
                 
                 if text_content:
                     # Metin istatistikleri
@@ -331,8 +216,76 @@ def show_essay_evaluation(db):
             assignment_title = st.text_input("📝 Ödev Başlığı (Opsiyonel)", placeholder="Kompozisyon Ödevi")
             assignment_date = st.date_input("📅 Ödev Tarihi", value=datetime.now().date())
         
+        max_workers = st.slider(
+            "⚡ Eşzamanlı AI İsteği",
+            min_value=1,
+            max_value=MAX_WORKERS_LIMIT,
+            value=min(DEFAULT_MAX_WORKERS, MAX_WORKERS_LIMIT),
+            help="Aynı anda Gemini'ye gönderilecek en fazla değerlendirme isteği"
+        )
+        
+        pack_short_essays = st.checkbox(
+            "📦 Kısa metinleri paketle",
+            help=f"{PACKING_MAX_WORDS} kelimeye kadar olan metinler tek istekte birlikte değerlendirilir; "
+                 "rubrik ve talimatlar her metin için tekrar gönderilmez. Yanıtta eksik veya hatalı dönen "
+                 "metinler tek tek yeniden değerlendirilir."
+        )
+        pack_size = 1
+        if pack_short_essays:
+            pack_size = st.slider("📦 Paket Başına Metin", min_value=2, max_value=PACKING_BATCH_LIMIT, value=PACKING_BATCH_SIZE)
+        
+        stream_results = st.checkbox(
+            "⚡ Canlı akış (kriterler geldikçe göster)",
+            help="Dosyalar sırayla değerlendirilir ve her kriterin puanı ile geri bildirimi "
+                 "model yanıtı tamamlanmadan ekrana yazılır. Eşzamanlılık ve paketleme bu modda kullanılmaz."
+        )
+        
+        run_in_background = st.checkbox(
+            "🕒 Arka planda değerlendir (iş kuyruğu)",
+            help="Dosyalar kuyruğa eklenir ve `python grading_worker.py` ile başlatılan çalışanlar tarafından "
+                 "değerlendirilir. Sayfadan ayrılsanız da değerlendirme devam eder."
+        )
+        
+        # Başlatmadan önce maliyet ve süre tahmini
+        essay_texts = [text for text in (get_extracted_text(file) for file in uploaded_files) if text]
+        _, rubric_prefix = compile_rubric_prompt(selected_rubric)
+        estimate = estimate_batch(
+            essay_texts,
+            estimate_tokens(rubric_prefix),
+            pack_size=1 if stream_results else pack_size,
+            is_packable=is_packable,
+            max_workers=1 if stream_results else max_workers,
+            rpm_limit=limiter_stats()['rpm_limit']
+        )
+        
+        st.markdown("**💡 Tahmini Maliyet ve Süre**")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("🔁 AI İsteği", estimate['requests'])
+        with col2:
+            st.metric("🔢 Token", f"{estimate['input_tokens'] + estimate['output_tokens']:,}",
+                      help=f"Girdi: {estimate['input_tokens']:,} / Çıktı: {estimate['output_tokens']:,}")
+        with col3:
+            st.metric("💲 Maliyet", f"${estimate['cost']:.4f}")
+        with col4:
+            seconds = estimate['seconds']
+            st.metric("⏱️ Süre", f"{seconds/60:.1f} dk" if seconds >= 90 else f"{seconds:.0f} sn")
+        if estimate['chunked_essays']:
+            st.info(f"📚 {estimate['chunked_essays']} uzun metin bölümlere ayrılıp paralel incelenecek, ardından tek bir rubrik geçişiyle puanlanacak.")
+        st.caption("Tahmin önbellek isabetlerini hesaba katmaz; gerçek maliyet daha düşük olabilir.")
+        
         # Ana değerlendirme butonu
-        if st.button("🚀 Değerlendirmeyi Başlat", type="primary", use_container_width=True):
+        start_grading = st.button("🚀 Değerlendirmeyi Başlat", type="primary", use_container_width=True)
+        
+        if start_grading and run_in_background:
+            enqueue_background_grading(db, uploaded_files, selected_rubric, {
+                "student_name": student_name,
+                "student_number": student_number,
+                "assignment_title": assignment_title,
+                "assignment_date": datetime.combine(assignment_date, datetime.min.time()) if assignment_date else None
+            })
+        
+        elif start_grading:
             
             # Progress bar
             progress_bar = st.progress(0)
@@ -340,59 +293,100 @@ def show_essay_evaluation(db):
             
             results = []
             
-            for i, file in enumerate(uploaded_files):
-                status_text.text(f"📄 {file.name} değerlendiriliyor... ({i+1}/{len(uploaded_files)})")
-                progress_bar.progress((i) / len(uploaded_files))
-                
-                # Dosya içeriğini çıkar
-                text_content = extract_text_from_file(file)
+            # Önizlemede çıkarılan metinler yeniden kullanılır
+            grading_items = []
+            for file in uploaded_files:
+                text_content = get_extracted_text(file)
                 
                 if text_content:
-                    # AI ile değerlendir
-                    status_text.text(f"🤖 AI analizi yapılıyor... ({i+1}/{len(uploaded_files)})")
+                    grading_items.append((file, text_content))
+                else:
+                    st.error(f"❌ {file.name} dosyası okunamadı!")
+            
+            # Tarih objesini datetime'a çevir
+            formatted_date = datetime.combine(assignment_date, datetime.min.time()) if assignment_date else datetime.now()
+            
+            status_text.text(f"🤖 AI analizi yapılıyor... (0/{len(uploaded_files)})")
+            completed = len(uploaded_files) - len(grading_items)
+            progress_bar.progress(completed / len(uploaded_files))
+            
+            # AI ile eşzamanlı değerlendir, biten her dosyayı hemen işle
+            evaluation_cache = init_evaluation_cache()
+            cache_hits = 0
+            cache_misses = 0
+            cached_keys = set()
+            
+            # Sonuçlar her LLM çağrısından sonra değil, toplu olarak kaydedilir
+            writer = EvaluationWriter(db.evaluations)
+            
+            def grade_pack(pack):
+                graded_pack = evaluate_many_with_cache(
+                    evaluation_cache, [text for _, text in pack], selected_rubric, MODEL_NAME, evaluate_essays_packed
+                )
+                return [((result, cache_hit), error) for result, cache_hit, error in graded_pack]
+            
+            if stream_results:
+                graded = stream_grading(grading_items, evaluation_cache, selected_rubric)
+            else:
+                graded = grade_packed_batch(
+                    grading_items,
+                    lambda item: evaluate_with_cache(evaluation_cache, item[1], selected_rubric, MODEL_NAME, evaluate_essay),
+                    grade_pack,
+                    lambda item: is_packable(item[1]),
+                    pack_size,
+                    max_workers=max_workers
+                )
+            
+            # Yarıda kesilse bile (ör. yeniden çalıştırma) bitmiş değerlendirmeler kaydedilir
+            try:
+                for (file, text_content), graded_result, error in graded:
+                    completed += 1
+                    progress_bar.progress(completed / len(uploaded_files))
+                    status_text.text(f"📄 {file.name} tamamlandı ({completed}/{len(uploaded_files)})")
                     
-                    evaluation_result = evaluate_with_gemini(text_content, selected_rubric)
+                    if error is not None:
+                        st.error(f"❌ {file.name} AI değerlendirme hatası: {error}")
+                        continue
                     
-                    if evaluation_result:
-                        # Tarih objesini datetime'a çevir
-                        formatted_date = datetime.combine(assignment_date, datetime.min.time()) if assignment_date else datetime.now()
-                        
-                        # Sonucu kaydet
-                        evaluation_data = {
-                            "rubric_id": selected_rubric_id,
-                            "rubric_name": selected_rubric['name'],
-                            "file_name": file.name,
-                            "student_name": student_name if student_name else "Anonim",
-                            "student_number": student_number if student_number else None,
-                            "assignment_title": assignment_title if assignment_title else None,
-                            "assignment_date": formatted_date,
-                            "essay_text": text_content,
-                            "evaluation_result": evaluation_result,
-                            "total_score": evaluation_result.get('total_score', 0),
-                            "percentage": evaluation_result.get('percentage', 0),
-                            "grade": evaluation_result.get('grade', 'N/A'),
-                            "created_at": datetime.now(),
-                            "updated_at": datetime.now()
-                        }
-                        
-                        # Veritabanına kaydet
-                        evaluation_id = save_evaluation_to_db(db, evaluation_data)
-                        
-                        if evaluation_id:
-                            evaluation_data['_id'] = evaluation_id
-                            results.append(evaluation_data)
-                            st.success(f"✅ {file.name} değerlendirmesi kaydedildi!")
-                        else:
-                            st.error(f"❌ {file.name} değerlendirmesi kaydedilemedi!")
+                    evaluation_result, cache_hit = graded_result
+                    
+                    # Sonucu kaydet
+                    evaluation_data = build_evaluation_data(
+                        selected_rubric, file.name, text_content, evaluation_result,
+                        student_name=student_name,
+                        student_number=student_number,
+                        assignment_title=assignment_title,
+                        assignment_date=formatted_date
+                    )
+                    
+                    if cache_hit:
+                        cache_hits += 1
+                        cached_keys.add(evaluation_data['idempotency_key'])
                     else:
-                        st.error(f"❌ {file.name} AI değerlendirme hatası!")
-                else:
-                    st.error(f"❌ {file.name} dosyası okunamadı!")
+                        cache_misses += 1
+                    
+                    # Veritabanına yazılmak üzere kuyruğa ekle
+                    write_report = writer.add(evaluation_data)
+                    if write_report:
+                        show_write_report(write_report, results, cached_keys)
+            finally:
+                graded.close()
+                final_report = writer.flush()
+            
+            show_write_report(final_report, results, cached_keys)
             
             # Progress tamamla
             progress_bar.progress(1.0)
             status_text.text("✅ Tüm değerlendirmeler tamamlandı!")
             
+            # Önbellek istatistikleri
+            cache_stats = evaluation_cache.stats()
+            st.info(
+                f"🗃️ Önbellek: {cache_hits} isabet, {cache_misses} ıskalama "
+                f"(sunucu toplamı: {cache_stats['hits']} isabet / {cache_stats['misses']} ıskalama, "
+                f"{cache_stats['coalesced']} eşzamanlı istek birleştirildi)"
+            )
+            
             # Sonuçları göster
             if results:
                 st.success(f"🎉 {len(results)} dosya başarıyla değerlendirildi!")
@@ -402,6 +396,110 @@ def show_essay_evaluation(db):
                 show_evaluation_results(results)
             else:
                 st.error("❌ Hiçbir dosya değerlendirilemedi!")
+    
+    # Kuyruğa eklenmiş toplu işlerin durumu
+    show_background_jobs(db)
+
+def stream_grading(grading_items, evaluation_cache, rubric_data):
+    """Dosyaları sırayla akış modunda değerlendir; kriterler geldikçe dosyanın kutusuna yazılır
+
+    ``grade_batch`` ile aynı ``(item, result, error)`` üçlülerini üretir. Streamlit
+    öğeleri yalnızca ana iş parçacığından güncellenebildiği için paralel çalışmaz.
+    """
+    for file, text_content in grading_items:
+        with st.expander(f"⚡ {file.name} - canlı değerlendirme", expanded=True):
+            criteria_area = st.container()
+        
+        def render_criterion(criterion, criteria_area=criteria_area):
+            criteria_area.markdown(
+                f"**{criterion.get('name', 'Kriter')}:** {criterion.get('score')}/{criterion.get('max_score', '?')} "
+                f"({criterion.get('level', '')})"
+            )
+            if criterion.get('feedback'):
+                criteria_area.write(criterion['feedback'])
+        
+        try:
+            graded_result = evaluate_with_cache(
+                evaluation_cache, text_content, rubric_data, MODEL_NAME,
+                lambda essay_text, rubric: evaluate_essay_stream(essay_text, rubric, on_criterion=render_criterion)
+            )
+        except Exception as e:
+            yield (file, text_content), None, e
+            continue
+        
+        if graded_result[1]:
+            criteria_area.info("🗃️ Sonuç önbellekten alındı.")
+        yield (file, text_content), graded_result, None
+
+def enqueue_background_grading(db, uploaded_files, rubric_data, metadata):
+    """Dosya metinlerini çıkarıp arka plan iş kuyruğuna ekle"""
+    items = []
+    for file in uploaded_files:
+        text_content = get_extracted_text(file)
+        if text_content:
+            items.append((file.name, text_content))
+        else:
+            st.error(f"❌ {file.name} dosyası okunamadı!")
+    
+    if not items:
+        st.error("❌ Kuyruğa eklenecek dosya yok!")
+        return None
+    
+    try:
+        batch_id = enqueue_grading_batch(db, rubric_data, items, metadata)
+    except Exception as e:
+        st.error(f"❌ İşler kuyruğa eklenemedi: {e}")
+        return None
+    
+    st.session_state.setdefault("grading_batches", []).append(batch_id)
+    st.success(f"🕒 {len(items)} dosya değerlendirme kuyruğuna eklendi. Durumu aşağıdan takip edebilirsiniz.")
+    return batch_id
+
+def show_background_jobs(db):
+    """Bu oturumda kuyruğa eklenen toplu işlerin durumunu göster"""
+    batch_ids = st.session_state.get("grading_batches", [])
+    if not batch_ids:
+        return
+    
+    st.markdown("---")
+    st.subheader("🕒 Arka Plan Değerlendirmeleri")
+    st.caption("İşler `python grading_worker.py` ile başlatılan çalışan süreçler tarafından işlenir.")
+    st.button("🔄 Durumu Yenile")
+    
+    batch_to_show = None
+    for batch_id in reversed(batch_ids):
+        jobs = get_batch_jobs(db, batch_id)
+        if not jobs:
+            continue
+        
+        counts = Counter(job['status'] for job in jobs)
+        finished = counts[STATUS_DONE] + counts[STATUS_FAILED]
+        
+        st.markdown(f"**📦 {jobs[0]['created_at'].strftime('%d.%m.%Y %H:%M')} — {finished}/{len(jobs)} dosya tamamlandı**")
+        st.progress(finished / len(jobs))
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("⏳ Kuyrukta", counts[STATUS_QUEUED])
+        with col2:
+            st.metric("⚙️ İşleniyor", counts[STATUS_RUNNING])
+        with col3:
+            st.metric("✅ Tamamlandı", counts[STATUS_DONE])
+        with col4:
+            st.metric("❌ Hatalı", counts[STATUS_FAILED])
+        
+        for job in jobs:
+            if job['status'] == STATUS_FAILED:
+                st.error(f"❌ {job['file_name']}: {job.get('error', 'Bilinmeyen hata')}")
+        
+        if counts[STATUS_DONE] and st.button("📊 Sonuçları Göster", key=f"show_batch_{batch_id}"):
+            batch_to_show = jobs
+    
+    if batch_to_show:
+        evaluation_ids = [job['evaluation_id'] for job in batch_to_show if job['status'] == STATUS_DONE]
+        results = list(db.evaluations.find({"_id": {"$in": evaluation_ids}}))
+        if results:
+            show_evaluation_results(results)
 
 def show_evaluation_results(results):
     """Değerlendirme sonuçlarını görüntüle"""
@@ -489,7 +587,10 @@ def show_evaluation_results(results):
                 with col3:
                     st.metric("📋 Paragraf", stats.get('paragraph_count', 'N/A'))
                 with col4:
-                    st.metric("📖 Okunabilirlik", stats.get('readability', 'N/A'))
+                    readability = stats.get('readability', 'N/A')
+                    if stats.get('atesman_score') is not None:
+                        readability = f"{readability} ({stats['atesman_score']:.0f})"
+                    st.metric("📖 Okunabilirlik", readability, help="Ateşman okunabilirlik puanı (0-100, yüksek = kolay)")
             
             # Genel feedback
             st.markdown("### 📝 Genel Değerlendirme")
@@ -514,144 +615,32 @@ def show_evaluation_results(results):
 def extract_text_from_file(uploaded_file):
     """Dosyadan metin çıkarma"""
     try:
-        file_extension = uploaded_file.name.split('.')[-1].lower()
-        
-        if file_extension == 'txt':
-            return uploaded_file.read().decode('utf-8')
-        
-        elif file_extension == 'pdf':
-            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text
-        
-        elif file_extension in ['doc', 'docx']:
-            doc = docx.Document(uploaded_file)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
-        
-        else:
-            return None
-            
-    except Exception as e:
-        st.error(f"❌ Dosya okuma hatası: {e}")
-        return None
-
-def evaluate_with_gemini(essay_text, rubric_data):
-    """Gemini AI ile essay değerlendirme"""
-    
-    # Rubrik kriterlerini formatla
-    criteria_text = ""
-    for i, criterion in enumerate(rubric_data['criteria'], 1):
-        criteria_text += f"{i}. {criterion['name']} ({criterion['weight']} puan)\n"
-        criteria_text += f"   Açıklama: {criterion['description']}\n"
-        
-        if criterion.get('levels'):
-            criteria_text += "   Performans Seviyeleri:\n"
-            for level, desc in criterion['levels'].items():
-                if desc:
-                    criteria_text += f"   - {level.title()}: {desc}\n"
-        criteria_text += "\n"
-    
-    prompt = f"""Sen deneyimli bir öğretmensin. Aşağıdaki öğrenci yazısını verilen rubrik kriterlerine göre objektif bir şekilde değerlendir.
-
-RUBRIK BİLGİLERİ:
-- Rubrik Adı: {rubric_data['name']}
-- Ders: {rubric_data.get('subject', 'Genel')}
-- Toplam Puan: {rubric_data['total_points']}
-
-DEĞERLENDIRME KRİTERLERİ:
-{criteria_text}
-
-ÖĞRENCİ METNİ:
-{essay_text}
-
-DEĞERLENDIRME FORMATI:
-Lütfen aşağıdaki JSON formatında yanıt ver:
-
-{{
-    "criteria_scores": [
-        {{
-            "name": "Kriter Adı",
-            "score": puan_sayısı,
-            "max_score": maksimum_puan,
-            "feedback": "Bu kritere ilişkin detaylı geri bildirim",
-            "level": "mükemmel/iyi/orta/zayıf"
-        }}
-    ],
-    "total_score": toplam_puan,
-    "total_max_score": {rubric_data['total_points']},
-    "percentage": yüzde_değeri,
-    "grade": "harf_notu",
-    "general_feedback": "Genel değerlendirme ve yorumlar",
-    "strengths": ["Güçlü yön 1", "Güçlü yön 2", "Güçlü yön 3"],
-    "improvements": ["Gelişim önerisi 1", "Gelişim önerisi 2", "Gelişim önerisi 3"],
-    "text_statistics": {{
-        "word_count": kelime_sayısı,
-        "sentence_count": cümle_sayısı,
-        "paragraph_count": paragraf_sayısı,
-        "readability": "kolay/orta/zor"
-    }}
-}}
-
-Değerlendirmeni profesyonel, yapıcı ve objektif bir dilde yap. Her kriter için verdiğin puanı gerekçelendir."""
-
-    try:
-        response = model.generate_content(prompt)
-        
-        # JSON'u temizle ve parse et
-        response_text = response.text.strip()
-        
-        # JSON kısmını bul
-        if "```json" in response_text:
-            json_start = response_text.find("```json") + 7
-            json_end = response_text.find("```", json_start)
-            json_text = response_text[json_start:json_end]
-        elif response_text.startswith("{"):
-            json_text = response_text
-        else:
-            # JSON bulunamadıysa, { ile başlayan kısmı bul
-            json_start = response_text.find("{")
-            if json_start != -1:
-                json_text = response_text[json_start:]
-            else:
-                raise ValueError("JSON formatı bulunamadı")
-        
-        # JSON'u parse et
-        evaluation_result = json.loads(json_text)
-        
-        # Harf notunu hesapla
-        percentage = evaluation_result.get('percentage', 0)
-        evaluation_result['grade'] = grade_converter(percentage)
-        
-        return evaluation_result
-        
-    except json.JSONDecodeError as e:
-        st.error(f"❌ AI yanıtı JSON formatında değil: {e}")
+        return extract_text(uploaded_file.name, uploaded_file.getvalue())
+    except ExtractionLimitError as e:
+        st.error(f"❌ {uploaded_file.name} çok büyük: {e}")
         return None
     except Exception as e:
-        st.error(f"❌ AI değerlendirme hatası: {e}")
+        st.error(f"❌ Dosya okuma hatası: {e}")
         return None
 
-def grade_converter(percentage):
-    """Yüzdeyi harf notuna çevir"""
-    if percentage >= 90:
-        return "AA"
-    elif percentage >= 85:
-        return "BA"
-    elif percentage >= 75:
-        return "BB"
-    elif percentage >= 65:
-        return "CB"
-    elif percentage >= 55:
-        return "CC"
-    elif percentage >= 45:
-        return "DC"
-    else:
-        return "FF"
+def get_extracted_text(uploaded_file):
+    """Dosya metnini içerik özetine göre bir kez çıkar, oturum boyunca sakla"""
+    data = uploaded_file.getvalue()
+    key = f"{file_digest(data)}:{file_extension(uploaded_file.name)}"
+    
+    extracted_texts = st.session_state.setdefault("extracted_texts", OrderedDict())
+    if key in extracted_texts:
+        extracted_texts.move_to_end(key)
+        return extracted_texts[key]
+    
+    text_content = extract_text_from_file(uploaded_file)
+    
+    # Oturumdaki önbellek sınırlı tutulur, en eski dosya atılır
+    extracted_texts[key] = text_content
+    while len(extracted_texts) > EXTRACTION_CACHE_SIZE:
+        extracted_texts.popitem(last=False)
+    
+    return text_content
 
 
 # Ana uygulama
@@ -674,6 +663,31 @@ def main():
         ["🏠 Ana Sayfa", "📋 Rubrik Yönetimi", "📄 Ödev Değerlendirme", "📊 Raporlar"]
     )
     
+    # Bağlantı havuzu kullanımı
+    with st.sidebar.expander("🔌 Veritabanı Bağlantı Havuzu", expanded=False):
+        stats = pool_stats()
+        st.write(f"**Kullanımda:** {stats['in_use']}/{stats['max_pool_size']} ({stats['utilization']*100:.0f}%)")
+        st.write(f"**Açık bağlantı:** {stats['open_connections']}")
+        st.write(f"**En yüksek kullanım:** {stats['peak_in_use']}")
+        st.write(f"**Bekleme zaman aşımı:** {stats['checkout_failures']}")
+    
+    # Gemini kota sınırlayıcı durumu
+    with st.sidebar.expander("🚦 Gemini Kota Durumu", expanded=False):
+        stats = limiter_stats()
+        st.write(f"**Kalan istek:** {stats['available_requests']}/{stats['rpm_limit']} (dakika)")
+        st.write(f"**Kalan token:** {stats['available_tokens']:,}/{stats['tpm_limit']:,} (dakika)")
+        st.write(f"**Toplam istek:** {stats['total_requests']} ({stats['total_tokens']:,} token)")
+        st.write(f"**Yeniden deneme:** {stats['retries']} (bekleme {stats['backoff_seconds']:.1f} sn)")
+        st.write(f"**Kota beklemesi:** {stats['throttled_seconds']:.1f} sn")
+        st.write(f"**Başarısız istek:** {stats['failures']}")
+        
+        stats = parse_stats()
+        st.write(
+            f"**Ayrıştırma hatası:** {stats['decode_errors'] + stats['invalid_results']}/{stats['responses']} "
+            f"({stats['failure_rate']*100:.1f}%)"
+        )
+        st.write(f"**Onarılan yanıt:** {stats['repaired']} ({stats['followup_requests']} ek kriter isteği)")
+    
     if page == "🏠 Ana Sayfa":
         show_homepage(db)
     elif page == "📋 Rubrik Yönetimi":
@@ -726,6 +740,9 @@ def show_rubric_management(db):
         template_rubrics = list(db.rubrics.find({"is_template": True}))
         custom_rubrics = list(db.rubrics.find({"is_template": False}))
         
+        # Rubrik kullanım istatistikleri sayfa başına tek sorguda alınır
+        rubric_usage = get_rubric_usage_stats(db)
+        
         # Hazır Şablonlar Bölümü
         st.subheader("📚 Hazır Şablonlar")
         
@@ -840,18 +857,12 @@ def show_rubric_management(db):
                         st.markdown("**📈 İstatistikler:**")
                         
                         # Bu rubrikle yapılan değerlendirme sayısı
-                        evaluation_count = db.evaluations.count_documents({"rubric_id": rubric['_id']})
-                        st.write(f"📊 Değerlendirme: {evaluation_count}")
+                        usage = rubric_usage.get(rubric['_id'], {"count": 0, "avg_score": None})
+                        st.write(f"📊 Değerlendirme: {usage['count']}")
                         
                         # Ortalama puan (eğer değerlendirme varsa)
-                        if evaluation_count > 0:
-                            avg_score = db.evaluations.aggregate([
-                                {"$match": {"rubric_id": rubric['_id']}},
-                                {"$group": {"_id": None, "avg_score": {"$avg": "$total_score"}}}
-                            ])
-                            avg_result = list(avg_score)
-                            if avg_result:
-                                st.write(f"📈 Ort. Puan: {avg_result[0]['avg_score']:.1f}")
+                        if usage['count'] > 0 and usage['avg_score'] is not None:
+                            st.write(f"📈 Ort. Puan: {usage['avg_score']:.1f}")
         else:
             st.info("📭 Henüz özel rubrik oluşturmamışsınız.")
             st.markdown("**💡 İpucu:** Yukarıdaki şablonları kopyalayarak başlayabilir veya sağdaki sekmeden yeni rubrik oluşturabilirsiniz.")
@@ -873,7 +884,7 @@ def show_rubric_management(db):
             st.metric("📊 Toplam Değerlendirme", total_evaluations)
         
         with col4:
-            active_rubrics = len([r for r in custom_rubrics + template_rubrics if db.evaluations.count_documents({"rubric_id": r['_id']}) > 0])
+            active_rubrics = len([r for r in custom_rubrics + template_rubrics if rubric_usage.get(r['_id'], {}).get('count', 0) > 0])
             st.metric("✅ Aktif Rubrik", active_rubrics)
     
     with tab2:
@@ -1003,7 +1014,10 @@ def show_evaluation_results(results):
                 with col3:
                     st.metric("📋 Paragraf", stats.get('paragraph_count', 'N/A'))
                 with col4:
-                    st.metric("📖 Okunabilirlik", stats.get('readability', 'N/A'))
+                    readability = stats.get('readability', 'N/A')
+                    if stats.get('atesman_score') is not None:
+                        readability = f"{readability} ({stats['atesman_score']:.0f})"
+                    st.metric("📖 Okunabilirlik", readability, help="Ateşman okunabilirlik puanı (0-100, yüksek = kolay)")
             
             # Genel feedback
             st.markdown("### 📝 Genel Değerlendirme")
@@ -1260,10 +1274,10 @@ def show_reports(db):
     """Raporlar sayfası"""
     st.header("📊 Raporlar ve Analizler")
     
-    # Genel istatistikleri al
-    total_evaluations = db.evaluations.count_documents({})
-    total_students = len(db.evaluations.distinct("student_name"))
-    total_rubrics = db.rubrics.count_documents({})
+    # Genel istatistikleri özet koleksiyonundan al
+    report_summary = get_report_summary(db)
+    total_evaluations = report_summary['total_evaluations']
+    total_students = report_summary['student_count']
     
     if total_evaluations == 0:
         st.warning("📭 Henüz değerlendirme yapılmamış. Önce ödev değerlendirme sayfasından dosya analizi yapın.")
@@ -1284,16 +1298,13 @@ def show_reports(db):
         st.metric("👥 Öğrenci Sayısı", total_students)
     
     with col3:
-        # Ortalama puan hesapla
-        avg_pipeline = [{"$group": {"_id": None, "avg_score": {"$avg": "$percentage"}}}]
-        avg_result = list(db.evaluations.aggregate(avg_pipeline))
-        avg_score = avg_result[0]['avg_score'] if avg_result else 0
+        # Ortalama puan
+        avg_score = report_summary['avg_percentage']
         st.metric("📊 Ortalama Başarı", f"{avg_score:.1f}%")
     
     with col4:
         # Başarılı öğrenci oranı (60% üzeri)
-        success_count = db.evaluations.count_documents({"percentage": {"$gte": 60}})
-        success_rate = (success_count / total_evaluations) * 100 if total_evaluations > 0 else 0
+        success_rate = report_summary['success_rate'] * 100
         st.metric("🏆 Başarı Oranı", f"{success_rate:.1f}%")
     
     st.markdown("---")
@@ -1329,7 +1340,7 @@ def show_dashboard_report(db):
     # Son değerlendirmeler
     st.markdown("### 🕒 Son Değerlendirmeler")
     
-    recent_evaluations = list(db.evaluations.find().sort("created_at", -1).limit(5))
+    recent_evaluations = get_recent_evaluations(db, limit=5)
     
     if recent_evaluations:
         for eval_data in recent_evaluations:
@@ -1356,11 +1367,7 @@ def show_dashboard_report(db):
     # Harf notu dağılımı
     st.markdown("### 📊 Harf Notu Dağılımı")
     
-    grade_pipeline = [
-        {"$group": {"_id": "$grade", "count": {"$sum": 1}}},
-        {"$sort": {"_id": 1}}
-    ]
-    grade_distribution = list(db.evaluations.aggregate(grade_pipeline))
+    grade_distribution = get_report_summary(db)['grade_distribution']
     
     if grade_distribution:
         col1, col2 = st.columns(2)
@@ -1392,12 +1399,7 @@ def show_dashboard_report(db):
     # En çok kullanılan rubrikler
     st.markdown("### 📋 Popüler Rubrikler")
     
-    rubric_pipeline = [
-        {"$group": {"_id": "$rubric_name", "count": {"$sum": 1}, "avg_score": {"$avg": "$percentage"}}},
-        {"$sort": {"count": -1}},
-        {"$limit": 5}
-    ]
-    popular_rubrics = list(db.evaluations.aggregate(rubric_pipeline))
+    popular_rubrics = get_rubric_summaries(db, limit=5)
     
     if popular_rubrics:
         for rubric_data in popular_rubrics:
@@ -1407,7 +1409,7 @@ def show_dashboard_report(db):
                 st.write(f"📋 **{rubric_data['_id']}**")
             
             with col2:
-                st.metric("📊 Kullanım", rubric_data['count'])
+                st.metric("📊 Kullanım", rubric_data['total_uses'])
             
             with col3:
                 st.metric("📈 Ortalama", f"{rubric_data['avg_score']:.1f}%")
@@ -1416,131 +1418,156 @@ def show_student_reports(db):
     """Öğrenci bazlı raporlar"""
     st.subheader("👥 Öğrenci Raporları")
     
-    # Öğrenci listesi
-    students = db.evaluations.distinct("student_name")
-    students = [s for s in students if s and s != "Anonim"]
+    # Arama ve sayfa boyutu
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        search = st.text_input("🔍 Öğrenci Ara", placeholder="Ad veya öğrenci numarası")
     
-    if not students:
-        st.info("📭 Adı girilmiş öğrenci bulunamadı. Değerlendirme yaparken öğrenci adı girmeyi unutmayın.")
+    with col2:
+        page_size = st.selectbox("📄 Sayfa Boyutu", [25, 50, 100])
+    
+    # Arama veya sayfa boyutu değişince ilk sayfaya dön
+    page_signature = (search, page_size)
+    if st.session_state.get("student_page_signature") != page_signature:
+        st.session_state.student_page_signature = page_signature
+        st.session_state.student_page_cursors = []
+    
+    cursors = st.session_state.student_page_cursors
+    after = cursors[-1] if cursors else None
+    
+    student_rows = get_student_page(db, page_size, after=after, search=search)
+    has_next = len(student_rows) > page_size
+    student_rows = student_rows[:page_size]
+    
+    if not student_rows:
+        if search:
+            st.info(f"📭 '{search}' ile eşleşen öğrenci bulunamadı.")
+        else:
+            st.info("📭 Adı girilmiş öğrenci bulunamadı. Değerlendirme yaparken öğrenci adı girmeyi unutmayın.")
         return
     
-    # Öğrenci seçimi
-    selected_student = st.selectbox("👤 Öğrenci Seçin:", ["Tümü"] + students)
+    # Tüm öğrencilerin özet raporu (tek tablo bileşeni)
+    st.markdown("### 📊 Öğrenci Özet Raporu")
+    
+    grade_color = {"AA": "🟢", "BA": "🟢", "BB": "🟡", "CB": "🟡", "CC": "🟠", "DC": "🔴", "FF": "🔴"}
+    table_rows = []
+    for student_data in student_rows:
+        grade = grade_converter(student_data['avg_score'])
+        table_rows.append({
+            "👤 Öğrenci Adı": student_data['_id'],
+            "🆔 Numara": ", ".join(student_data.get('student_numbers') or []),
+            "📊 Değerlendirme": student_data['total_evaluations'],
+            "📈 Ortalama": f"{grade_color.get(grade, '⚪')} {student_data['avg_score']:.1f}%",
+            "🏆 En Yüksek": f"{student_data['max_score']:.1f}%",
+            "📉 En Düşük": f"{student_data['min_score']:.1f}%",
+            "📅 Son Tarih": student_data['latest_date'].strftime('%d.%m.%Y') if student_data.get('latest_date') else "-"
+        })
+    
+    st.dataframe(table_rows, use_container_width=True, hide_index=True)
+    
+    # Sayfalama
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col1:
+        if st.button("◀️ Önceki", disabled=not cursors, key="student_prev_page"):
+            cursors.pop()
+            st.rerun()
+    
+    with col2:
+        st.write(f"Sayfa {len(cursors) + 1}")
+    
+    with col3:
+        if st.button("Sonraki ▶️", disabled=not has_next, key="student_next_page"):
+            last_row = student_rows[-1]
+            cursors.append((last_row['avg_score'], last_row['_id']))
+            st.rerun()
     
-    if selected_student == "Tümü":
-        # Tüm öğrencilerin özet raporu
-        st.markdown("### 📊 Tüm Öğrenciler Özet Rapor")
+    st.markdown("---")
+    
+    # Öğrenci seçimi (yalnızca bu sayfadaki öğrenciler)
+    selected_student = st.selectbox("👤 Detay İçin Öğrenci Seçin:", ["Seçiniz"] + [r['_id'] for r in student_rows])
+    
+    if selected_student == "Seçiniz":
+        return
+    
+    # Seçili öğrencinin detaylı raporu
+    st.markdown(f"### 👤 {selected_student} - Detaylı Rapor")
+    
+    student_stats = get_student_stats(db, selected_student)
+    
+    if student_stats:
+        col1, col2, col3, col4 = st.columns(4)
         
-        student_stats_pipeline = [
-            {"$match": {"student_name": {"$ne": "Anonim"}}},
-            {"$group": {
-                "_id": "$student_name",
-                "total_evaluations": {"$sum": 1},
-                "avg_score": {"$avg": "$percentage"},
-                "max_score": {"$max": "$percentage"},
-                "min_score": {"$min": "$percentage"},
-                "latest_date": {"$max": "$created_at"}
-            }},
-            {"$sort": {"avg_score": -1}}
-        ]
+        with col1:
+            st.metric("📊 Toplam Değerlendirme", student_stats['total_evaluations'])
         
-        student_stats = list(db.evaluations.aggregate(student_stats_pipeline))
+        with col2:
+            st.metric("📈 Ortalama Puan", f"{student_stats['avg_score']:.1f}%")
         
-        if student_stats:
-            # Tablo başlığı
-            col1, col2, col3, col4, col5, col6 = st.columns([2, 1, 1, 1, 1, 1])
-            
-            with col1:
-                st.write("**👤 Öğrenci Adı**")
-            with col2:
-                st.write("**📊 Değerlendirme**")
-            with col3:
-                st.write("**📈 Ortalama**")
-            with col4:
-                st.write("**🏆 En Yüksek**")
-            with col5:
-                st.write("**📉 En Düşük**")
-            with col6:
-                st.write("**📅 Son Tarih**")
-            
-            st.markdown("---")
-            
-            # Öğrenci verileri
-            for student_data in student_stats:
-                col1, col2, col3, col4, col5, col6 = st.columns([2, 1, 1, 1, 1, 1])
-                
-                with col1:
-                    st.write(f"👤 {student_data['_id']}")
-                
-                with col2:
-                    st.write(f"{student_data['total_evaluations']} adet")
-                
-                with col3:
-                    avg_score = student_data['avg_score']
-                    grade = grade_converter(avg_score)
-                    grade_color = {"AA": "🟢", "BA": "🟢", "BB": "🟡", "CB": "🟡", "CC": "🟠", "DC": "🔴", "FF": "🔴"}
-                    st.write(f"{grade_color.get(grade, '⚪')} {avg_score:.1f}%")
-                
-                with col4:
-                    st.write(f"🏆 {student_data['max_score']:.1f}%")
-                
-                with col5:
-                    st.write(f"📉 {student_data['min_score']:.1f}%")
-                
-                with col6:
-                    st.write(f"📅 {student_data['latest_date'].strftime('%d.%m.%Y')}")
-    
-    else:
-        # Seçili öğrencinin detaylı raporu
-        st.markdown(f"### 👤 {selected_student} - Detaylı Rapor")
+        with col3:
+            st.metric("🏆 En Yüksek Puan", f"{student_stats['max_score']:.1f}%")
         
-        student_evaluations = list(db.evaluations.find({"student_name": selected_student}).sort("created_at", -1))
+        with col4:
+            st.metric("📉 En Düşük Puan", f"{student_stats['min_score']:.1f}%")
+    
+    st.markdown("---")
+    
+    # Öğrencinin son değerlendirmeleri
+    st.markdown("#### 📄 Son Değerlendirmeler")
+    
+    student_evaluations = get_student_evaluations(db, selected_student, limit=page_size)
+    
+    if not student_evaluations:
+        return
+    
+    st.dataframe([
+        {
+            "📄 Dosya": eval_data['file_name'],
+            "📋 Rubrik": eval_data['rubric_name'],
+            "📝 Not": eval_data['grade'],
+            "📊 Yüzde": f"{eval_data['percentage']:.1f}%",
+            "💯 Puan": eval_data['total_score'],
+            "📅 Tarih": eval_data['created_at'].strftime('%d.%m.%Y %H:%M')
+        }
+        for eval_data in student_evaluations
+    ], use_container_width=True, hide_index=True)
+    
+    # Yalnızca seçilen değerlendirmenin detayı çizilir
+    evaluation_labels = {
+        f"{i}. {eval_data['file_name']} - {eval_data['grade']} ({eval_data['percentage']:.1f}%)": eval_data
+        for i, eval_data in enumerate(student_evaluations, 1)
+    }
+    selected_label = st.selectbox("🔎 Değerlendirme Detayı:", list(evaluation_labels.keys()))
+    eval_data = evaluation_labels[selected_label]
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.write(f"**📋 Rubrik:** {eval_data['rubric_name']}")
+        st.write(f"**📅 Tarih:** {eval_data['created_at'].strftime('%d.%m.%Y %H:%M')}")
+        st.write(f"**💯 Puan:** {eval_data['total_score']}")
+        st.write(f"**📊 Yüzde:** {eval_data['percentage']:.1f}%")
+    
+    with col2:
+        if eval_data.get('assignment_title'):
+            st.write(f"**📝 Ödev:** {eval_data['assignment_title']}")
         
-        if student_evaluations:
-            # Öğrenci istatistikleri
-            scores = [eval_data['percentage'] for eval_data in student_evaluations]
-            
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric("📊 Toplam Değerlendirme", len(student_evaluations))
-            
-            with col2:
-                st.metric("📈 Ortalama Puan", f"{sum(scores)/len(scores):.1f}%")
-            
-            with col3:
-                st.metric("🏆 En Yüksek Puan", f"{max(scores):.1f}%")
-            
-            with col4:
-                st.metric("📉 En Düşük Puan", f"{min(scores):.1f}%")
-            
-            st.markdown("---")
-            
-            # Öğrencinin tüm değerlendirmeleri
-            st.markdown("#### 📄 Tüm Değerlendirmeler")
-            
-            for i, eval_data in enumerate(student_evaluations, 1):
-                with st.expander(f"{i}. {eval_data['file_name']} - {eval_data['grade']} ({eval_data['percentage']:.1f}%)", expanded=False):
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.write(f"**📋 Rubrik:** {eval_data['rubrik_name']}")
-                        st.write(f"**📅 Tarih:** {eval_data['created_at'].strftime('%d.%m.%Y %H:%M')}")
-                        st.write(f"**💯 Puan:** {eval_data['total_score']}")
-                        st.write(f"**📊 Yüzde:** {eval_data['percentage']:.1f}%")
-                    
-                    with col2:
-                        if eval_data.get('assignment_title'):
-                            st.write(f"**📝 Ödev:** {eval_data['assignment_title']}")
-                        
-                        # Kriter başarıları
-                        if eval_data.get('evaluation_result', {}).get('criteria_scores'):
-                            st.write("**📊 Kriter Puanları:**")
-                            for criterion in eval_data['evaluation_result']['criteria_scores']:
-                                progress_value = criterion['score'] / criterion['max_score']
-                                st.write(f"• {criterion['name']}: {criterion['score']}/{criterion['max_score']}")
-                                st.progress(progress_value)
+        # Kriter başarıları
+        if eval_data.get('evaluation_result', {}).get('criteria_scores'):
+            st.write("**📊 Kriter Puanları:**")
+            for criterion in eval_data['evaluation_result']['criteria_scores']:
+                progress_value = criterion['score'] / criterion['max_score']
+                st.write(f"• {criterion['name']}: {criterion['score']}/{criterion['max_score']}")
+                st.progress(progress_value)
+    
+    # Öğrenci metni yalnızca istenirse yüklenir
+    if st.button("📖 Öğrenci Metnini Göster", key=f"essay_{eval_data['_id']}"):
+        essay_text = load_essay_text(db, eval_data)
+        if essay_text:
+            st.text_area("", value=essay_text, height=300, disabled=True, key=f"essay_text_{eval_data['_id']}")
+        else:
+            st.info("📭 Bu değerlendirmenin metni bulunamadı.")
 
 def show_rubric_analysis(db):
     """Rubrik bazlı analizler"""
@@ -1561,21 +1588,7 @@ def show_rubric_analysis(db):
         # Tüm rubriklerin karşılaştırmalı analizi
         st.markdown("### 📊 Rubrik Karşılaştırma")
         
-        rubric_stats_pipeline = [
-            {"$group": {
-                "_id": "$rubric_name",
-                "total_uses": {"$sum": 1},
-                "avg_score": {"$avg": "$percentage"},
-                "success_rate": {
-                    "$avg": {
-                        "$cond": [{"$gte": ["$percentage", 60]}, 1, 0]
-                    }
-                }
-            }},
-            {"$sort": {"total_uses": -1}}
-        ]
-        
-        rubric_stats = list(db.evaluations.aggregate(rubric_stats_pipeline))
+        rubric_stats = get_rubric_summaries(db)
         
         if rubric_stats:
             for rubric_data in rubric_stats:
@@ -1597,28 +1610,25 @@ def show_rubric_analysis(db):
         # Seçili rubrikin detaylı analizi
         st.markdown(f"### 📋 {selected_rubric} - Detaylı Analiz")
         
-        # Bu rubrikle yapılan değerlendirmeler
-        rubric_evaluations = list(db.evaluations.find({"rubric_name": selected_rubric}))
+        # Bu rubrikle yapılan değerlendirmelerin özeti (sunucuda hesaplanır)
+        score_summary = get_rubric_score_summary(db, selected_rubric)
         
-        if rubric_evaluations:
+        if score_summary:
             # Genel istatistikler
-            scores = [eval_data['percentage'] for eval_data in rubric_evaluations]
-            
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                st.metric("📊 Toplam Kullanım", len(rubric_evaluations))
+                st.metric("📊 Toplam Kullanım", score_summary['count'])
             
             with col2:
-                st.metric("📈 Ortalama Puan", f"{sum(scores)/len(scores):.1f}%")
+                st.metric("📈 Ortalama Puan", f"{score_summary['avg_score']:.1f}%")
             
             with col3:
-                success_count = len([s for s in scores if s >= 60])
-                success_rate = (success_count / len(scores)) * 100
+                success_rate = (score_summary['success_count'] / score_summary['count']) * 100
                 st.metric("🏆 Başarı Oranı", f"{success_rate:.1f}%")
             
             with col4:
-                st.metric("📊 En Yüksek", f"{max(scores):.1f}%")
+                st.metric("📊 En Yüksek", f"{score_summary['max_score']:.1f}%")
             
             st.markdown("---")
             
@@ -1629,27 +1639,27 @@ def show_rubric_analysis(db):
             rubric_doc = db.rubrics.find_one({"name": selected_rubric})
             
             if rubric_doc:
-                # Her kriter için ortalama başarı hesapla
+                criterion_stats = get_criterion_stats(db, selected_rubric)
+                
                 for criterion in rubric_doc['criteria']:
-                    criterion_scores = []
-                    
-                    for eval_data in rubric_evaluations:
-                        if eval_data.get('evaluation_result', {}).get('criteria_scores'):
-                            for crit_score in eval_data['evaluation_result']['criteria_scores']:
-                                if crit_score['name'] == criterion['name']:
-                                    criterion_scores.append(crit_score['score'] / crit_score['max_score'])
+                    stats = criterion_stats.get(criterion['name'])
                     
-                    if criterion_scores:
-                        avg_performance = sum(criterion_scores) / len(criterion_scores)
+                    if stats:
+                        avg_performance = min(max(stats['avg'], 0.0), 1.0)
                         
                         col1, col2 = st.columns([3, 1])
                         
                         with col1:
                             st.write(f"**{criterion['name']}** ({criterion['weight']} puan)")
                             st.progress(avg_performance)
+                            st.caption(
+                                f"Dağılım: p25 {stats['p25']*100:.1f}% · "
+                                f"Medyan {stats['median']*100:.1f}% · "
+                                f"p75 {stats['p75']*100:.1f}% ({stats['count']} değerlendirme)"
+                            )
                             
                         with col2:
-                            st.metric("Ortalama", f"{avg_performance*100:.1f}%")
+                            st.metric("Ortalama", f"{stats['avg']*100:.1f}%")
         else:
             st.info(f"📭 {selected_rubric} rubriği henüz kullanılmamış.")
 
@@ -1662,11 +1672,7 @@ def show_graphic_analysis(db):
     # Basit metin tabanlı grafikler
     st.markdown("### 📊 Harf Notu Dağılımı")
     
-    grade_pipeline = [
-        {"$group": {"_id": "$grade", "count": {"$sum": 1}}},
-        {"$sort": {"_id": 1}}
-    ]
-    grade_distribution = list(db.evaluations.aggregate(grade_pipeline))
+    grade_distribution = get_report_summary(db)['grade_distribution']
     
     if grade_distribution:
         total_count = sum(g['count'] for g in grade_distribution)
@@ -1687,39 +1693,37 @@ def show_graphic_analysis(db):
     # Zaman bazlı trend
     st.markdown("### 📅 Zaman Bazlı Trend")
     
-    # Son 30 günün değerlendirmeleri
-    from datetime import datetime, timedelta
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        trend_ranges = {"Son 30 Gün": 30, "Son 90 Gün": 90, "Son 1 Yıl": 365}
+        trend_range = st.selectbox("📅 Zaman Aralığı", list(trend_ranges.keys()))
+    
+    with col2:
+        granularities = {"Günlük": "day", "Haftalık": "week", "Dönemlik": "term"}
+        granularity_label = st.selectbox("🗓️ Gruplama", list(granularities.keys()))
     
-    thirty_days_ago = datetime.now() - timedelta(days=30)
+    since = datetime.now() - timedelta(days=trend_ranges[trend_range])
     
-    recent_evaluations = list(db.evaluations.find({
-        "created_at": {"$gte": thirty_days_ago}
-    }).sort("created_at", 1))
+    # Günlük kovalar sunucuda seçilen aralığa göre gruplanır
+    trend = get_score_trend(db, since, granularities[granularity_label])
     
-    if recent_evaluations:
-        # Günlük ortalama hesapla
-        daily_stats = {}
+    if trend:
+        st.write(f"**{trend_range} - {granularity_label} Trend:**")
         
-        for eval_data in recent_evaluations:
-            date_key = eval_data['created_at'].strftime('%Y-%m-%d')
-            
-            if date_key not in daily_stats:
-                daily_stats[date_key] = {'scores': [], 'count': 0}
+        for bucket in trend:
+            avg_score = bucket['avg_score']
             
-            daily_stats[date_key]['scores'].append(eval_data['percentage'])
-            daily_stats[date_key]['count'] += 1
-        
-        st.write("**Son 30 Günlük Trend:**")
-        
-        for date_key in sorted(daily_stats.keys()):
-            data = daily_stats[date_key]
-            avg_score = sum(data['scores']) / len(data['scores'])
+            if granularity_label == "Dönemlik":
+                period_label = f"{bucket['period'].strftime('%m.%Y')} dönemi"
+            else:
+                period_label = bucket['period'].strftime('%Y-%m-%d')
             
             # Basit trend gösterimi
             trend_bar = "█" * int(avg_score / 10)
-            st.write(f"{date_key}: {trend_bar} {avg_score:.1f}% ({data['count']} değerlendirme)")
+            st.write(f"{period_label}: {trend_bar} {avg_score:.1f}% ({bucket['count']} değerlendirme)")
     else:
-        st.info("📭 Son 30 günde değerlendirme bulunamadı.")
+        st.info(f"📭 {trend_range} içinde değerlendirme bulunamadı.")
 
 def show_export_options(db):
     """Export seçenekleri"""
@@ -1728,26 +1732,21 @@ def show_export_options(db):
     st.markdown("### 📊 Mevcut Veriler")
     
     # Export edilebilir veri türleri
-    total_evaluations = db.evaluations.count_documents({})
-    total_students = len(db.evaluations.distinct("student_name"))
+    report_summary = get_report_summary(db)
+    total_evaluations = report_summary['total_evaluations']
+    total_students = report_summary['student_count']
     total_rubrics = db.rubrics.count_documents({})
     
     col1, col2, col3 = st.columns(3)
     
     with col1:
         st.metric("📄 Değerlendirmeler", total_evaluations)
-        if st.button("📥 Değerlendirmeler Export", disabled=True):
-            st.info("CSV/Excel export özelliği yakında eklenecek!")
     
     with col2:
         st.metric("👥 Öğrenci Verileri", total_students)
-        if st.button("📥 Öğrenci Raporu Export", disabled=True):
-            st.info("PDF rapor özelliği yakında eklenecek!")
     
     with col3:
         st.metric("📋 Rubrik Verileri", total_rubrics)
-        if st.button("📥 Rubrik Analizi Export", disabled=True):
-            st.info("Rubrik analizi export özelliği yakında eklenecek!")
     
     st.markdown("---")
     
@@ -1763,17 +1762,54 @@ def show_export_options(db):
         )
     
     with col2:
+        export_formats = {
+            "PDF": ("pdf", "application/pdf"),
+            "Excel (.xlsx)": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+            "CSV": ("csv", "text/csv"),
+            "JSON Lines (.jsonl)": ("jsonl", "application/x-ndjson")
+        }
         export_format = st.selectbox(
             "📁 Export Formatı",
-            ["PDF", "Excel (.xlsx)", "CSV", "JSON"],
+            list(export_formats.keys()),
             help="Export edilecek dosya formatını seçin"
         )
     
     include_details = st.checkbox("📋 Detaylı bilgileri dahil et", value=True)
     include_feedback = st.checkbox("💬 AI geri bildirimlerini dahil et", value=False)
     
-    if st.button("🚀 Export Oluştur", type="primary", disabled=True):
-        st.info(f"🔄 {export_format} formatında export özelliği geliştiriliyor...")
+    if st.button("🚀 Export Oluştur", type="primary"):
+        if len(date_range) != 2:
+            st.warning("⚠️ Lütfen başlangıç ve bitiş tarihi seçin.")
+        else:
+            start_date, end_date = date_range
+            extension, mime_type = export_formats[export_format]
+            
+            # Satırlar cursor'dan geçici dosyaya parça parça yazılır; download_button
+            # ise bayt içeriği ister, bu yüzden hazır dosya sonunda bir kez okunur
+            export_file = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+            try:
+                with st.spinner(f"🔄 {export_format} dosyası hazırlanıyor..."):
+                    row_count = export_evaluations(
+                        db, extension, start_date, end_date, export_file,
+                        include_details=include_details,
+                        include_feedback=include_feedback
+                    )
+                export_file.seek(0)
+                export_data = export_file.read()
+                
+                st.success(f"✅ {row_count} değerlendirme export edildi!")
+                st.download_button(
+                    "📥 Dosyayı İndir",
+                    data=export_data,
+                    file_name=f"degerlendirmeler_{start_date:%Y%m%d}_{end_date:%Y%m%d}.{extension}",
+                    mime=mime_type
+                )
+            except ImportError as e:
+                st.error(f"❌ {e}")
+            except Exception as e:
+                st.error(f"❌ Export hatası: {e}")
+            finally:
+                export_file.close()
     
     st.markdown("---")
     
@@ -1800,26 +1836,6 @@ def show_export_options(db):
     if st.button("📧 Otomatik Rapor Ayarla", disabled=True):
         st.info("Otomatik e-posta raporu özelliği yakında!")
 
-def grade_converter(percentage):
-    """Yüzdeyi harf notuna çevir"""
-    if percentage >= 90:
-        return "AA"
-    elif percentage >= 85:
-        return "BA"
-    elif percentage >= 75:
-        return "BB"
-    elif percentage >= 65:
-        return "CB"
-    elif percentage >= 55:
-        return "CC"
-    elif percentage >= 45:
-        return "DC"
-    else:
-        return "FF"
-
-
-
-
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,71 @@
+import os
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Aynı anda Gemini'ye gönderilecek en fazla istek sayısı
+DEFAULT_MAX_WORKERS = int(os.getenv("GRADING_MAX_WORKERS", "4"))
+MAX_WORKERS_LIMIT = 16
+
+def grade_batch(items, grade_fn, max_workers=None):
+    """Öğeleri sınırlı bir iş parçacığı havuzunda eşzamanlı değerlendirir
+
+    Her öğe için ``(item, result, error)`` üçlüsü, yükleme sırasına göre değil
+    değerlendirmenin bittiği sırayla üretilir. ``grade_fn`` içinde oluşan hata
+    diğer öğeleri durdurmaz, ilgili üçlünün ``error`` alanında döner.
+    """
+    items = list(items)
+    if not items:
+        return
+
+    workers = max_workers or DEFAULT_MAX_WORKERS
+    workers = max(1, min(workers, MAX_WORKERS_LIMIT, len(items)))
+
+    # Üreteç erken kapatılırsa (ör. Streamlit yeniden çalıştırması) sıradaki işler
+    # iptal edilir ve devam edenler beklenmez
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="grading")
+    try:
+        futures = {executor.submit(grade_fn, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                yield item, future.result(), None
+            except Exception as e:
+                yield item, None, e
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def pack_items(items, is_packable, pack_size):
+    """Kısa öğeleri ``pack_size``'lık paketlere ayır; diğerleri tek başına kalır"""
+    packable = [item for item in items if is_packable(item)]
+    groups = [[item] for item in items if not is_packable(item)]
+    groups += [packable[i:i + pack_size] for i in range(0, len(packable), pack_size)]
+    return groups
+
+def grade_packed_batch(items, grade_fn, grade_pack_fn, is_packable, pack_size, max_workers=None):
+    """``grade_batch`` gibi, ancak kısa öğeleri paketler halinde tek çağrıda değerlendirir
+
+    ``grade_pack_fn`` bir öğe listesi alır ve aynı sırayla ``(result, error)``
+    listesi döndürür. Çıktı yine öğe başına ``(item, result, error)`` üçlüleridir.
+    """
+    items = list(items)
+    groups = pack_items(items, is_packable, pack_size) if pack_size > 1 else [[item] for item in items]
+
+    def grade_group(group):
+        if len(group) == 1:
+            try:
+                return [(grade_fn(group[0]), None)]
+            except Exception as e:
+                return [(None, e)]
+        return grade_pack_fn(group)
+
+    with closing(grade_batch(groups, grade_group, max_workers=max_workers)) as graded:
+        for group, results, error in graded:
+            if error is not None:
+                for item in group:
+                    yield item, None, error
+                continue
+            for item, (result, item_error) in zip(group, results):
+                yield item, result, item_error
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from mongo_client import get_db
+from evaluation_writer import ensure_idempotency_index
+from job_queue import ensure_job_indexes
+
+# Rapor sayfalarının kullandığı sorgular için indeksler
+EVALUATION_INDEXES = [
+    IndexModel([("student_name", ASCENDING), ("created_at", DESCENDING)], name="student_name_created_at"),
+    IndexModel([("rubric_id", ASCENDING), ("created_at", DESCENDING)], name="rubric_id_created_at"),
+    IndexModel([("rubric_name", ASCENDING), ("created_at", DESCENDING)], name="rubric_name_created_at"),
+    IndexModel([("created_at", DESCENDING)], name="created_at"),
+    IndexModel([("percentage", ASCENDING)], name="percentage"),
+]
+
+RUBRIC_INDEXES = [
+    IndexModel([("is_template", ASCENDING), ("name", ASCENDING)], name="is_template_name"),
+    IndexModel([("name", ASCENDING)], name="name"),
+]
+
+STUDENT_STATS_INDEXES = [
+    IndexModel([("avg_score", DESCENDING), ("_id", ASCENDING)], name="avg_score_id"),
+    IndexModel([("student_numbers", ASCENDING)], name="student_numbers"),
+]
+
+def ensure_indexes(db):
+    """Tüm indeksleri oluştur; mevcut indeksler olduğu gibi kalır"""
+    created = []
+    created += db.evaluations.create_indexes(EVALUATION_INDEXES)
+    created += db.rubrics.create_indexes(RUBRIC_INDEXES)
+    created += db.student_stats.create_indexes(STUDENT_STATS_INDEXES)
+    created += ensure_job_indexes(db)
+    ensure_idempotency_index(db.evaluations)
+    return created
+
+def report_queries():
+    """Rapor sayfalarının çalıştırdığı temsili sorgular: (açıklama, koleksiyon, filtre, sıralama, limit)"""
+    thirty_days_ago = datetime.now() - timedelta(days=30)
+    return [
+        ("Öğrenci detay raporu", "evaluations", {"student_name": "Örnek Öğrenci"}, [("created_at", DESCENDING)], 0),
+        ("Rubrik kullanım sayısı", "evaluations", {"rubric_id": ObjectId()}, None, 0),
+        ("Son 30 gün trendi", "evaluations", {"created_at": {"$gte": thirty_days_ago}}, [("created_at", ASCENDING)], 0),
+        ("Rubrik detay analizi", "evaluations", {"rubric_name": "Kompozisyon Rubriği"}, None, 0),
+        ("Başarı oranı", "evaluations", {"percentage": {"$gte": 60}}, None, 0),
+        ("Son değerlendirmeler", "evaluations", {}, [("created_at", DESCENDING)], 5),
+        ("Öğrenci tablosu sayfası", "student_stats", {"avg_score": {"$lt": 50}}, [("avg_score", DESCENDING), ("_id", ASCENDING)], 25),
+        ("Öğrenci numarası ile arama", "student_stats", {"student_numbers": "12345"}, None, 0),
+        ("İş kuyruğundan sıradaki iş", "jobs", {"status": "queued"}, [("created_at", ASCENDING)], 1),
+        ("Toplu iş durumu", "jobs", {"batch_id": "0" * 32}, [("created_at", ASCENDING)], 0),
+        ("Şablon rubrikler", "rubrics", {"is_template": True}, None, 0),
+        ("Özel rubrikler", "rubrics", {"is_template": False}, None, 0),
+        ("Rubrik adı ile arama", "rubrics", {"name": "Kompozisyon Rubriği"}, None, 1),
+    ]
+
+def _plan_stages(plan):
+    """Sorgu planındaki tüm aşama adlarını topla"""
+    if not isinstance(plan, dict):
+        return []
+    stages = [plan['stage']] if 'stage' in plan else []
+    for key in ('queryPlan', 'inputStage'):
+        stages += _plan_stages(plan.get(key))
+    for child in plan.get('inputStages', []):
+        stages += _plan_stages(child)
+    return stages
+
+def check_query_plans(db):
+    """Rapor sorgularını explain() ile kontrol et; koleksiyon taraması yapanları döndür"""
+    collection_scans = []
+    for description, collection_name, query, sort, limit in report_queries():
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+
+        winning_plan = cursor.explain()['queryPlanner']['winningPlan']
+        stages = _plan_stages(winning_plan)
+        if 'COLLSCAN' in stages:
+            collection_scans.append((description, collection_name, query))
+            print(f"❌ {description}: koleksiyon taraması ({' → '.join(stages)})")
+        else:
+            print(f"✅ {description}: {' → '.join(stages)}")
+    return collection_scans
+
+if __name__ == "__main__":
+    db = get_db()
+
+    print("🚀 İndeksler oluşturuluyor...")
+    for name in ensure_indexes(db):
+        print(f"📇 {name}")
+
+    print("\n🔍 Rapor sorguları kontrol ediliyor...")
+    scans = check_query_plans(db)
+    if scans:
+        print(f"\n⚠️ {len(scans)} sorgu hâlâ koleksiyon taraması yapıyor!")
+    else:
+        print("\n✅ Hiçbir rapor sorgusu koleksiyon taraması yapmıyor.")
@@ -0,0 +1,104 @@
+import os
+import gridfs
+from datetime import datetime
+from pymongo import ReplaceOne
+from gridfs.errors import FileExists
+from dotenv import load_dotenv
+
+from mongo_client import get_db
+
+load_dotenv()
+
+# Bu boyutun üzerindeki metinler GridFS'e yazılır
+GRIDFS_THRESHOLD_BYTES = int(os.getenv("ESSAY_GRIDFS_THRESHOLD_BYTES", str(1024 * 1024)))
+GRIDFS_BUCKET = "essay_files"
+
+STORAGE_COLLECTION = "collection"
+STORAGE_GRIDFS = "gridfs"
+
+def store_essay_texts(db, evaluations):
+    """Değerlendirmelerdeki öğrenci metinlerini essay_texts koleksiyonuna (veya GridFS'e) taşı
+
+    Her değerlendirmenin ``essay_text_id`` alanı metnin anahtarıdır; yazma
+    upsert olduğundan tekrar çağrılması güvenlidir. Değerlendirme belgelerine
+    ``essay_text_id`` ve ``essay_storage`` alanları eklenir.
+    """
+    operations = []
+    fs = None
+
+    for evaluation_data in evaluations:
+        essay_text = evaluation_data.get('essay_text')
+        if essay_text is None or not evaluation_data.get('essay_text_id'):
+            continue
+
+        encoded = essay_text.encode('utf-8')
+        if len(encoded) > GRIDFS_THRESHOLD_BYTES:
+            fs = fs or gridfs.GridFS(db, collection=GRIDFS_BUCKET)
+            try:
+                fs.put(encoded, _id=evaluation_data['essay_text_id'], encoding='utf-8')
+            except FileExists:
+                pass
+            evaluation_data['essay_storage'] = STORAGE_GRIDFS
+        else:
+            operations.append(ReplaceOne(
+                {"_id": evaluation_data['essay_text_id']},
+                {"text": essay_text, "created_at": datetime.now()},
+                upsert=True
+            ))
+            evaluation_data['essay_storage'] = STORAGE_COLLECTION
+
+    if operations:
+        db.essay_texts.bulk_write(operations, ordered=False)
+
+def load_essay_text(db, evaluation_data):
+    """Değerlendirmenin öğrenci metnini ihtiyaç anında yükle"""
+    if evaluation_data.get('essay_text') is not None:
+        return evaluation_data['essay_text']
+
+    essay_text_id = evaluation_data.get('essay_text_id')
+    if essay_text_id is None:
+        return None
+
+    if evaluation_data.get('essay_storage') == STORAGE_GRIDFS:
+        fs = gridfs.GridFS(db, collection=GRIDFS_BUCKET)
+        return fs.get(essay_text_id).read().decode('utf-8')
+
+    doc = db.essay_texts.find_one({"_id": essay_text_id}, {"text": 1})
+    return doc['text'] if doc else None
+
+def migrate_essay_texts(db, batch_size=200):
+    """Eski değerlendirmelerde gömülü duran essay_text alanlarını ayrı koleksiyona taşı"""
+    moved = 0
+    while True:
+        batch = list(db.evaluations.find(
+            {"essay_text": {"$exists": True}},
+            {"essay_text": 1, "idempotency_key": 1}
+        ).limit(batch_size))
+        if not batch:
+            return moved
+
+        for evaluation_data in batch:
+            evaluation_data['essay_text_id'] = evaluation_data.get('idempotency_key') or evaluation_data['_id']
+        store_essay_texts(db, batch)
+
+        for evaluation_data in batch:
+            # Metni boş (null) olan kayıtlarda taşınacak bir şey yok, yalnızca alan kaldırılır
+            if 'essay_storage' not in evaluation_data:
+                db.evaluations.update_one({"_id": evaluation_data['_id']}, {"$unset": {"essay_text": ""}})
+                continue
+            db.evaluations.update_one(
+                {"_id": evaluation_data['_id']},
+                {
+                    "$set": {
+                        "essay_text_id": evaluation_data['essay_text_id'],
+                        "essay_storage": evaluation_data['essay_storage']
+                    },
+                    "$unset": {"essay_text": ""}
+                }
+            )
+        moved += len(batch)
+
+if __name__ == "__main__":
+    print("🚀 Öğrenci metinleri essay_texts koleksiyonuna taşınıyor...")
+    count = migrate_essay_texts(get_db())
+    print(f"✅ {count} değerlendirmenin metni taşındı.")
@@ -0,0 +1,188 @@
+import os
+import re
+import copy
+import json
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from dotenv import load_dotenv
+from pymongo.errors import PyMongoError
+
+from single_flight import SingleFlight, run_leased
+
+load_dotenv()
+
+# Önbellek ayarları
+CACHE_TTL_SECONDS = int(os.getenv("EVALUATION_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+CACHE_LRU_SIZE = int(os.getenv("EVALUATION_CACHE_LRU_SIZE", "256"))
+
+def normalize_essay_text(essay_text):
+    """Önbellek anahtarı için metni normalize et (Unicode NFC, boşluklar tekilleştirilir)"""
+    text = unicodedata.normalize("NFC", essay_text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+def essay_digest(essay_text):
+    """Normalize edilmiş metnin SHA-256 özeti"""
+    return hashlib.sha256(normalize_essay_text(essay_text).encode("utf-8")).hexdigest()
+
+def rubric_revision(rubric_data):
+    """Rubriğin revizyon bilgisi (son güncellenme zamanı)"""
+    revision = rubric_data.get('revision') or rubric_data.get('updated_at') or rubric_data.get('created_at')
+    return str(revision) if revision else ""
+
+def rubric_digest(rubric_data):
+    """Rubriğin puanlamayı etkileyen alanlarının SHA-256 özeti"""
+    payload = {
+        "criteria": rubric_data.get('criteria', []),
+        "total_points": rubric_data.get('total_points'),
+        "revision": rubric_revision(rubric_data),
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def make_cache_key(essay_text, rubric_data, model_name):
+    """(metin özeti, rubrik özeti, model) üçlüsünden önbellek anahtarı üret"""
+    raw = f"{essay_digest(essay_text)}:{rubric_digest(rubric_data)}:{model_name}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class EvaluationCache:
+    """Süreç içi LRU + TTL indeksli MongoDB koleksiyonu ile iki katmanlı değerlendirme önbelleği
+
+    ``lease`` verilirse (EvaluationLease) aynı değerlendirme farklı süreçlerde de
+    yalnızca bir kez yapılır.
+    """
+
+    def __init__(self, collection, maxsize=CACHE_LRU_SIZE, ttl_seconds=CACHE_TTL_SECONDS, lease=None):
+        self.collection = collection
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.lease = lease
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def ensure_indexes(self):
+        """Süresi dolan kayıtları MongoDB'nin silmesi için TTL indeksi oluştur"""
+        self.collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._lru[key] = value
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+    def get(self, key, record_stats=True):
+        """Anahtara ait değerlendirmeyi getir, yoksa None döndür"""
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.hits += record_stats
+                return copy.deepcopy(self._lru[key])
+
+        try:
+            doc = self.collection.find_one({"_id": key}, {"evaluation_result": 1})
+        except PyMongoError:
+            doc = None
+
+        if doc is None:
+            with self._lock:
+                self.misses += record_stats
+            return None
+
+        self._remember(key, doc['evaluation_result'])
+        with self._lock:
+            self.hits += record_stats
+        return copy.deepcopy(doc['evaluation_result'])
+
+    def set(self, key, evaluation_result, model_name=None):
+        """Değerlendirmeyi önbelleğe yaz; veritabanı hatası değerlendirmeyi engellemez"""
+        self._remember(key, copy.deepcopy(evaluation_result))
+        try:
+            self.collection.replace_one(
+                {"_id": key},
+                {
+                    "_id": key,
+                    "evaluation_result": evaluation_result,
+                    "model": model_name,
+                    "created_at": datetime.now()
+                },
+                upsert=True
+            )
+        except PyMongoError:
+            pass
+
+    def record_coalesced(self):
+        with self._lock:
+            self.coalesced += 1
+
+    def stats(self):
+        """İsabet/ıskalama sayaçları"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "lru_size": len(self._lru),
+                "in_flight": _single_flight.in_flight()
+            }
+
+# Süreç içinde devam eden değerlendirmeler (anahtar: önbellek anahtarı)
+_single_flight = SingleFlight()
+
+def evaluate_with_cache(cache, essay_text, rubric_data, model_name, evaluate_fn):
+    """Önbellekte varsa sonucu döndür, yoksa ``evaluate_fn`` ile değerlendirip kaydet
+
+    Aynı (metin, rubrik, model) için eşzamanlı çağrılar tek bir model çağrısını
+    bekler ve onun sonucunu paylaşır. ``(evaluation_result, cache_hit)`` çifti
+    döndürür; paylaşılan sonuçlar da isabet sayılır.
+    """
+    key = make_cache_key(essay_text, rubric_data, model_name)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, True
+
+    def evaluate():
+        evaluation_result = evaluate_fn(essay_text, rubric_data)
+        cache.set(key, evaluation_result, model_name=model_name)
+        return evaluation_result
+
+    def evaluate_once():
+        if cache.lease is None:
+            return evaluate(), False
+        return run_leased(cache.lease, key, lambda: cache.get(key, record_stats=False), evaluate)
+
+    (evaluation_result, shared_by_process), shared_by_thread = _single_flight.do(key, evaluate_once)
+    if shared_by_process or shared_by_thread:
+        cache.record_coalesced()
+        return evaluation_result, True
+    return evaluation_result, False
+
+def evaluate_many_with_cache(cache, essay_texts, rubric_data, model_name, evaluate_many_fn):
+    """Birden fazla metni önbellek üzerinden değerlendir; önbellekte olmayanlar tek çağrıda işlenir
+
+    ``evaluate_many_fn`` metin listesini alır ve aynı sırayla ``(sonuç, hata)``
+    listesi döndürür. Giriş sırasıyla ``(evaluation_result, cache_hit, error)``
+    listesi döndürür.
+    """
+    keys = [make_cache_key(essay_text, rubric_data, model_name) for essay_text in essay_texts]
+    graded = [None] * len(essay_texts)
+    pending = []
+    for i, key in enumerate(keys):
+        cached = cache.get(key)
+        if cached is not None:
+            graded[i] = (cached, True, None)
+        else:
+            pending.append(i)
+
+    if pending:
+        results = evaluate_many_fn([essay_texts[i] for i in pending], rubric_data)
+        for i, (evaluation_result, error) in zip(pending, results):
+            if error is None:
+                cache.set(keys[i], evaluation_result, model_name=model_name)
+            graded[i] = (evaluation_result, False, error)
+    return graded
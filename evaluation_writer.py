@@ -0,0 +1,200 @@
+import os
+import time
+import hashlib
+from datetime import datetime, date
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from dotenv import load_dotenv
+
+from evaluation_cache import essay_digest, rubric_revision
+from report_stats import record_evaluations
+from essay_store import store_essay_texts
+
+load_dotenv()
+
+# Toplu yazma ayarları
+WRITE_BATCH_SIZE = int(os.getenv("EVALUATION_WRITE_BATCH_SIZE", "20"))
+WRITE_FLUSH_INTERVAL = float(os.getenv("EVALUATION_WRITE_FLUSH_INTERVAL", "5"))
+WRITE_RETRIES = int(os.getenv("EVALUATION_WRITE_RETRIES", "2"))
+
+DUPLICATE_KEY_ERROR = 11000
+
+def ensure_idempotency_index(collection):
+    """Aynı değerlendirmenin iki kez yazılmasını engelleyen benzersiz indeks"""
+    collection.create_index("idempotency_key", unique=True, sparse=True)
+
+def make_idempotency_key(evaluation_data, rubric_data=None):
+    """Değerlendirmeyi tekil olarak tanımlayan anahtar
+
+    Aynı öğrenci/ödev bilgisiyle aynı metnin aynı rubrik revizyonuyla yapılan
+    değerlendirmesi her zaman aynı anahtarı üretir.
+    """
+    parts = [
+        str(evaluation_data.get('rubric_id')),
+        rubric_revision(rubric_data) if rubric_data else "",
+        essay_digest(evaluation_data.get('essay_text', "")),
+        str(evaluation_data.get('student_name')),
+        str(evaluation_data.get('student_number')),
+        str(evaluation_data.get('assignment_title')),
+        str(evaluation_data.get('assignment_date')),
+        str(evaluation_data.get('file_name')),
+    ]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+def build_evaluation_data(rubric_data, file_name, essay_text, evaluation_result, student_name=None,
+                          student_number=None, assignment_title=None, assignment_date=None):
+    """Değerlendirme sonucundan evaluations koleksiyonuna yazılacak belgeyi oluştur"""
+    now = datetime.now()
+    evaluation_data = {
+        "rubric_id": rubric_data['_id'],
+        "rubric_name": rubric_data['name'],
+        "file_name": file_name,
+        "student_name": student_name if student_name else "Anonim",
+        "student_number": student_number if student_number else None,
+        "assignment_title": assignment_title if assignment_title else None,
+        "assignment_date": assignment_date or now,
+        "essay_text": essay_text,
+        "evaluation_result": evaluation_result,
+        "total_score": evaluation_result.get('total_score', 0),
+        "percentage": evaluation_result.get('percentage', 0),
+        "grade": evaluation_result.get('grade', 'N/A'),
+        "created_at": now,
+        "updated_at": now
+    }
+    evaluation_data['idempotency_key'] = make_idempotency_key(evaluation_data, rubric_data)
+    return evaluation_data
+
+def normalize_evaluation_dates(evaluation_data):
+    """date objelerini MongoDB'nin kabul ettiği datetime'a çevir"""
+    assignment_date = evaluation_data.get('assignment_date')
+    if isinstance(assignment_date, date) and not isinstance(assignment_date, datetime):
+        evaluation_data['assignment_date'] = datetime.combine(assignment_date, datetime.min.time())
+    return evaluation_data
+
+def write_evaluations(collection, evaluations, retries=WRITE_RETRIES):
+    """Değerlendirmeleri tek bir sırasız bulk_write ile yaz
+
+    Her belge idempotency_key üzerinden upsert edilir; tekrar denenen bir yazma
+    mevcut kaydı değiştirmez. Sonuç ``inserted``, ``duplicates`` ve ``failed``
+    listelerini içerir.
+    """
+    report = {"inserted": [], "duplicates": [], "failed": []}
+    if not evaluations:
+        return report
+
+    for evaluation_data in evaluations:
+        normalize_evaluation_dates(evaluation_data)
+        evaluation_data.setdefault('_id', ObjectId())
+        if not evaluation_data.get('idempotency_key'):
+            evaluation_data['idempotency_key'] = make_idempotency_key(evaluation_data)
+        evaluation_data.setdefault('essay_text_id', evaluation_data['idempotency_key'])
+
+    # Öğrenci metinleri rapor sorgularına yük olmaması için ayrı saklanır. Bu yazma
+    # başarısız olursa metinler eski biçimde değerlendirme belgesine gömülür
+    # (`python essay_store.py` sonradan taşır); hatası değerlendirme yazımına karışmaz
+    excluded_fields = ('idempotency_key', 'essay_text')
+    for attempt in range(retries + 1):
+        try:
+            store_essay_texts(collection.database, evaluations)
+            break
+        except PyMongoError:
+            if attempt == retries:
+                excluded_fields = ('idempotency_key', 'essay_storage')
+            else:
+                time.sleep(0.5 * (attempt + 1))
+
+    operations = []
+    for evaluation_data in evaluations:
+        document = {k: v for k, v in evaluation_data.items() if k not in excluded_fields}
+        operations.append(UpdateOne(
+            {"idempotency_key": evaluation_data['idempotency_key']},
+            {"$setOnInsert": document},
+            upsert=True
+        ))
+
+    failed_indexes = {}
+    upserted_indexes = set()
+    attempt = 0
+
+    while True:
+        try:
+            result = collection.bulk_write(operations, ordered=False)
+            upserted_indexes = set(result.upserted_ids.keys())
+            break
+        except BulkWriteError as e:
+            upserted_indexes = {u['index'] for u in e.details.get('upserted', [])}
+            for write_error in e.details.get('writeErrors', []):
+                if write_error.get('code') != DUPLICATE_KEY_ERROR:
+                    failed_indexes[write_error['index']] = write_error.get('errmsg', 'Yazma hatası')
+            break
+        except PyMongoError as e:
+            # Upsert'ler idempotent olduğundan tüm toplu işlem güvenle tekrarlanabilir
+            attempt += 1
+            if attempt > retries:
+                failed_indexes = {i: str(e) for i in range(len(evaluations))}
+                break
+            time.sleep(0.5 * attempt)
+
+    duplicate_keys = []
+    for i, evaluation_data in enumerate(evaluations):
+        if i in failed_indexes:
+            report["failed"].append((evaluation_data, failed_indexes[i]))
+        elif i in upserted_indexes:
+            report["inserted"].append(evaluation_data)
+        else:
+            duplicate_keys.append(evaluation_data['idempotency_key'])
+            report["duplicates"].append(evaluation_data)
+
+    # Rapor özetleri yalnızca yeni eklenen değerlendirmelerle güncellenir
+    if report["inserted"]:
+        try:
+            record_evaluations(collection.database, report["inserted"])
+        except PyMongoError:
+            # Özet sapmaları `python report_stats.py` ile yeniden hesaplanabilir
+            pass
+
+    # Tekrar eden değerlendirmeler için yeni sonuç değil, kayıtlı belge döndürülür
+    if duplicate_keys:
+        try:
+            existing = {
+                doc['idempotency_key']: doc
+                for doc in collection.find({"idempotency_key": {"$in": duplicate_keys}})
+            }
+            report["duplicates"] = [
+                {**existing[e['idempotency_key']], "essay_text": e.get('essay_text')}
+                if e['idempotency_key'] in existing else e
+                for e in report["duplicates"]
+            ]
+        except PyMongoError:
+            pass
+
+    return report
+
+class EvaluationWriter:
+    """Biten değerlendirmeleri biriktirip boyut veya süre dolunca toplu yazar"""
+
+    def __init__(self, collection, batch_size=WRITE_BATCH_SIZE, flush_interval=WRITE_FLUSH_INTERVAL):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._first_pending_at = None
+
+    def add(self, evaluation_data):
+        """Değerlendirmeyi kuyruğa ekle; yazma gerçekleşirse raporunu, yoksa None döndür"""
+        if not self._pending:
+            self._first_pending_at = time.monotonic()
+        self._pending.append(evaluation_data)
+
+        batch_full = len(self._pending) >= self.batch_size
+        interval_elapsed = time.monotonic() - self._first_pending_at >= self.flush_interval
+        if batch_full or interval_elapsed:
+            return self.flush()
+        return None
+
+    def flush(self):
+        """Kuyruktaki tüm değerlendirmeleri yaz"""
+        pending, self._pending = self._pending, []
+        self._first_pending_at = None
+        return write_evaluations(self.collection, pending)
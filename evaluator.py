@@ -0,0 +1,547 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypedDict
+from dotenv import load_dotenv
+
+from gemini_client import get_client, json_generation_config
+from evaluation_cache import rubric_digest
+from json_repair import parse_partial_json
+from text_statistics import compute_text_statistics
+from token_budget import needs_chunking, split_into_sections
+
+load_dotenv()
+
+# Gemini istemcisi (kota sınırlama ve yeniden deneme gemini_client modülünde)
+MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+model = get_client(MODEL_NAME)
+
+# Paketleme modu: bu kelime sayısına kadar olan metinler tek istekte birlikte değerlendirilebilir
+PACKING_MAX_WORDS = int(os.getenv("PACKING_MAX_WORDS", "300"))
+PACKING_BATCH_SIZE = int(os.getenv("PACKING_BATCH_SIZE", "5"))
+PACKING_BATCH_LIMIT = 10
+
+# Derlenmiş rubrik prompt'larının süreç içinde tutulacağı en fazla sayı
+COMPILED_PROMPT_CACHE_SIZE = int(os.getenv("COMPILED_PROMPT_CACHE_SIZE", "64"))
+
+# Uzun metinlerde aynı anda incelenecek en fazla bölüm
+SECTION_MAX_WORKERS = int(os.getenv("SECTION_MAX_WORKERS", "4"))
+
+# Modelin döndürmesi gereken değerlendirme şeması (structured output)
+class CriterionScore(TypedDict):
+    name: str
+    score: float
+    max_score: float
+    feedback: str
+    level: str
+
+class EvaluationResult(TypedDict):
+    criteria_scores: list[CriterionScore]
+    total_score: float
+    total_max_score: float
+    percentage: float
+    general_feedback: str
+    strengths: list[str]
+    improvements: list[str]
+
+class PackedEvaluationResult(EvaluationResult):
+    essay_id: str
+
+class CriteriaScores(TypedDict):
+    criteria_scores: list[CriterionScore]
+
+class CriterionNote(TypedDict):
+    name: str
+    observations: str
+    provisional_score: float
+
+class SectionAssessment(TypedDict):
+    summary: str
+    criterion_notes: list[CriterionNote]
+
+EVALUATION_CONFIG = json_generation_config(EvaluationResult)
+PACKED_EVALUATION_CONFIG = json_generation_config(list[PackedEvaluationResult])
+CRITERIA_CONFIG = json_generation_config(CriteriaScores)
+SECTION_CONFIG = json_generation_config(SectionAssessment)
+
+# Yanıt ayrıştırma metrikleri
+_parse_lock = threading.Lock()
+_parse_metrics = {"responses": 0, "decode_errors": 0, "invalid_results": 0, "repaired": 0, "followup_requests": 0}
+
+def _record_parse(outcome):
+    with _parse_lock:
+        _parse_metrics["responses"] += 1
+        if outcome:
+            _parse_metrics[outcome] += 1
+
+def _record_repair(metric):
+    with _parse_lock:
+        _parse_metrics[metric] += 1
+
+def parse_stats():
+    """Yanıt sayısı, JSON çözme ve eksik alan hataları ile toplam hata oranı"""
+    with _parse_lock:
+        stats = dict(_parse_metrics)
+    failures = stats["decode_errors"] + stats["invalid_results"]
+    stats["failure_rate"] = failures / stats["responses"] if stats["responses"] else 0
+    return stats
+
+def _criterion_key(name):
+    return str(name or "").strip().casefold()
+
+def grade_converter(percentage):
+    """Yüzdeyi harf notuna çevir"""
+    if percentage >= 90:
+        return "AA"
+    elif percentage >= 85:
+        return "BA"
+    elif percentage >= 75:
+        return "BB"
+    elif percentage >= 65:
+        return "CB"
+    elif percentage >= 55:
+        return "CC"
+    elif percentage >= 45:
+        return "DC"
+    else:
+        return "FF"
+
+def format_rubric_criteria(rubric_data):
+    """Rubrik kriterlerini prompt metnine çevir"""
+    criteria_text = ""
+    for i, criterion in enumerate(rubric_data['criteria'], 1):
+        criteria_text += f"{i}. {criterion['name']} ({criterion['weight']} puan)\n"
+        criteria_text += f"   Açıklama: {criterion['description']}\n"
+
+        if criterion.get('levels'):
+            criteria_text += "   Performans Seviyeleri:\n"
+            for level, desc in criterion['levels'].items():
+                if desc:
+                    criteria_text += f"   - {level.title()}: {desc}\n"
+        criteria_text += "\n"
+    return criteria_text
+
+def format_rubric_info(rubric_data):
+    """Rubrik başlık bilgileri ve kriterler"""
+    return f"""RUBRIK BİLGİLERİ:
+- Rubrik Adı: {rubric_data['name']}
+- Ders: {rubric_data.get('subject', 'Genel')}
+- Toplam Puan: {rubric_data['total_points']}
+
+DEĞERLENDIRME KRİTERLERİ:
+{format_rubric_criteria(rubric_data)}"""
+
+def evaluation_format(rubric_data, extra_fields=""):
+    """Modelden beklenen değerlendirme JSON şablonu"""
+    return f"""{{{extra_fields}
+    "criteria_scores": [
+        {{
+            "name": "Kriter Adı",
+            "score": puan_sayısı,
+            "max_score": maksimum_puan,
+            "feedback": "Bu kritere ilişkin detaylı geri bildirim",
+            "level": "mükemmel/iyi/orta/zayıf"
+        }}
+    ],
+    "total_score": toplam_puan,
+    "total_max_score": {rubric_data['total_points']},
+    "percentage": yüzde_değeri,
+    "grade": "harf_notu",
+    "general_feedback": "Genel değerlendirme ve yorumlar",
+    "strengths": ["Güçlü yön 1", "Güçlü yön 2", "Güçlü yön 3"],
+    "improvements": ["Gelişim önerisi 1", "Gelişim önerisi 2", "Gelişim önerisi 3"]
+}}"""
+
+def rubric_prompt_key(rubric_data):
+    """Rubriğin prompt'a giren alanlarının (ad, ders, kriterler, puan, revizyon) özeti"""
+    payload = f"{rubric_data.get('name')}|{rubric_data.get('subject')}|{rubric_digest(rubric_data)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _build_rubric_prompt(rubric_data):
+    return f"""Sen deneyimli bir öğretmensin. Rubrik ve format bilgilerinden sonra verilen öğrenci yazısını aşağıdaki rubrik kriterlerine göre objektif bir şekilde değerlendir.
+
+{format_rubric_info(rubric_data)}
+
+DEĞERLENDIRME FORMATI:
+Yanıtın aşağıdaki alanları içeren bir JSON nesnesi olacak:
+
+{evaluation_format(rubric_data)}
+
+Değerlendirmeni profesyonel, yapıcı ve objektif bir dilde yap. Her kriter için verdiğin puanı gerekçelendir."""
+
+_compiled_prompts = OrderedDict()
+_compiled_prompts_lock = threading.Lock()
+
+def compile_rubric_prompt(rubric_data):
+    """Rubrik ve talimatlardan oluşan sabit prompt önekini revizyon başına bir kez oluştur
+
+    ``(anahtar, önek)`` döndürür. Önek aynı rubrik revizyonu için bayt bayt aynı
+    kalır; öğrenci metni her zaman önekten sonra gelir, böylece önek Gemini
+    context cache'te paylaşılabilir.
+    """
+    key = rubric_prompt_key(rubric_data)
+    with _compiled_prompts_lock:
+        if key in _compiled_prompts:
+            _compiled_prompts.move_to_end(key)
+            return key, _compiled_prompts[key]
+
+    prefix = _build_rubric_prompt(rubric_data)
+    with _compiled_prompts_lock:
+        _compiled_prompts[key] = prefix
+        while len(_compiled_prompts) > COMPILED_PROMPT_CACHE_SIZE:
+            _compiled_prompts.popitem(last=False)
+    return key, prefix
+
+def build_essay_prompt(essay_text):
+    """Prompt'un öğrenciye özgü (önekten sonra gelen) kısmı"""
+    return f"""ÖĞRENCİ METNİ:
+{essay_text}"""
+
+def build_evaluation_prompt(essay_text, rubric_data):
+    """Rubrik ve öğrenci metninden değerlendirme prompt'unu oluştur"""
+    _, prefix = compile_rubric_prompt(rubric_data)
+    return f"{prefix}\n\n{build_essay_prompt(essay_text)}"
+
+def _evaluation_request(essay_prompt, rubric_data):
+    """İsteği gönderecek istemci ve içerik: önek önbellekteyse yalnızca öğrenciye özgü kısım gider"""
+    key, prefix = compile_rubric_prompt(rubric_data)
+    cached_model = model.with_cached_prefix(key, prefix)
+    if cached_model is not None:
+        return cached_model, essay_prompt
+    return model, f"{prefix}\n\n{essay_prompt}"
+
+def build_section_prompt(section_text, index, total, rubric_data):
+    """Uzun metnin tek bir bölümünü rubrik açısından inceleme prompt'u"""
+    return f"""Sen deneyimli bir öğretmensin. Uzun bir öğrenci metninin {index}/{total}. bölümünü okuyorsun. Bu bölümü aşağıdaki rubrik kriterleri açısından incele; nihai puanlama tüm bölümler birleştirildikten sonra yapılacak.
+
+{format_rubric_info(rubric_data)}
+BÖLÜM METNİ:
+{section_text}
+
+Bölümün kısa bir özetini ("summary") ve her kriter için bu bölümdeki gözlemlerini ("observations") ve yalnızca bu bölüme göre geçici puanını ("provisional_score") içeren "criterion_notes" listesini döndür. Kriter adlarını aynen kullan."""
+
+def build_sections_prompt(assessments):
+    """Bölüm notlarından birleştirme isteğinin öğrenciye özgü kısmı"""
+    parts = []
+    for index, assessment in enumerate(assessments, 1):
+        notes = "\n".join(
+            f"- {note.get('name')} (geçici puan: {note.get('provisional_score')}): {note.get('observations', '')}"
+            for note in assessment.get('criterion_notes', [])
+        )
+        parts.append(f"BÖLÜM {index} ÖZETİ:\n{assessment.get('summary', '')}\nKriter gözlemleri:\n{notes}")
+
+    sections_text = "\n\n".join(parts)
+    return f"""ÖĞRENCİ METNİ:
+Metin çok uzun olduğu için bölüm bölüm incelendi. Aşağıda her bölümün özeti ve kriter gözlemleri var. Değerlendirmeyi bölümler için değil, metnin bütünü için yap.
+
+{sections_text}"""
+
+def build_packed_evaluation_prompt(essays, rubric_data):
+    """Aynı rubrikle değerlendirilecek birden fazla metin için tek prompt
+
+    ``essays`` ``(essay_id, metin)`` çiftleridir; rubrik ve talimatlar bir kez yazılır.
+    """
+    essays_text = "\n\n".join(
+        f"=== METİN {essay_id} BAŞLANGICI ===\n{essay_text}\n=== METİN {essay_id} SONU ==="
+        for essay_id, essay_text in essays
+    )
+    essay_ids = ", ".join(f'"{essay_id}"' for essay_id, _ in essays)
+    item_format = evaluation_format(rubric_data, extra_fields='\n    "essay_id": "metin_kimliği",')
+
+    return f"""Sen deneyimli bir öğretmensin. Aşağıdaki {len(essays)} öğrenci yazısını verilen rubrik kriterlerine göre objektif bir şekilde ve her birini diğerlerinden bağımsız olarak değerlendir.
+
+{format_rubric_info(rubric_data)}
+
+ÖĞRENCİ METİNLERİ:
+{essays_text}
+
+DEĞERLENDIRME FORMATI:
+Lütfen her metin için aşağıdaki formatta bir nesne içeren bir JSON dizisi ile yanıt ver.
+"essay_id" alanı metnin kimliği olmalıdır; beklenen kimlikler: {essay_ids}
+
+[
+{item_format}
+]
+
+Değerlendirmeni profesyonel, yapıcı ve objektif bir dilde yap. Her kriter için verdiğin puanı gerekçelendir."""
+
+def build_missing_criteria_prompt(essay_text, rubric_data, missing_criteria):
+    """Yalnızca eksik kalan kriterler için kısa değerlendirme prompt'u"""
+    return f"""Sen deneyimli bir öğretmensin. Aşağıdaki öğrenci yazısını YALNIZCA verilen kriterlere göre değerlendir.
+
+RUBRIK: {rubric_data['name']}
+
+DEĞERLENDIRME KRİTERLERİ:
+{format_rubric_criteria({'criteria': missing_criteria})}
+ÖĞRENCİ METNİ:
+{essay_text}
+
+Her kriter için "name", "score", "max_score", "feedback" ve "level" alanlarını içeren bir "criteria_scores" listesi döndür. Kriter adlarını aynen kullan ve kısa geri bildirim yaz."""
+
+def decode_response_json(response_text):
+    """Şemalı yanıtı doğrudan JSON olarak çöz
+
+    Metriklere işlemez; her model yanıtı onu ayrıştıran yerde tam bir kez
+    ``_record_parse`` ile sayılır.
+    """
+    return json.loads(response_text)
+
+def _is_valid_criterion(criterion):
+    return isinstance(criterion, dict) and isinstance(criterion.get('score'), (int, float))
+
+def is_valid_evaluation(evaluation_result):
+    """Değerlendirmenin puanlama için gereken alanları taşıyıp taşımadığını kontrol et"""
+    if not isinstance(evaluation_result, dict):
+        return False
+    criteria_scores = evaluation_result.get('criteria_scores')
+    if not isinstance(criteria_scores, list) or not criteria_scores:
+        return False
+    if not all(_is_valid_criterion(criterion) for criterion in criteria_scores):
+        return False
+    return all(isinstance(evaluation_result.get(field), (int, float)) for field in ('total_score', 'percentage'))
+
+def parse_evaluation_response(response_text):
+    """Şemalı model yanıtını değerlendirme sözlüğüne çevir"""
+    try:
+        evaluation_result = decode_response_json(response_text)
+    except json.JSONDecodeError:
+        _record_parse("decode_errors")
+        raise
+    if not is_valid_evaluation(evaluation_result):
+        _record_parse("invalid_results")
+        raise ValueError("Değerlendirme yanıtında zorunlu alanlar eksik")
+    _record_parse(None)
+
+    # Harf notunu hesapla
+    percentage = evaluation_result.get('percentage', 0)
+    evaluation_result['grade'] = grade_converter(percentage)
+
+    return evaluation_result
+
+def parse_packed_evaluation_response(response_text, essay_ids):
+    """Paketlenmiş yanıttan geçerli değerlendirmeleri essay_id'ye göre ayıkla
+
+    Beklenmeyen, tekrar eden veya eksik alanlı sonuçlar atlanır; bunlar için
+    çağıran tekli değerlendirmeye döner.
+    """
+    outcome = None
+    try:
+        parsed = decode_response_json(response_text)
+    except json.JSONDecodeError:
+        # Kesilmiş yanıttaki tamamlanmış sonuçlar kullanılır, kalanlar tekli değerlendirmeye düşer
+        outcome = "decode_errors"
+        parsed, _ = parse_partial_json(response_text)
+    if not isinstance(parsed, list):
+        _record_parse(outcome or "invalid_results")
+        raise ValueError("JSON dizisi bulunamadı")
+    _record_parse(outcome)
+
+    expected = set(essay_ids)
+    results = {}
+    for evaluation_result in parsed:
+        if not is_valid_evaluation(evaluation_result):
+            continue
+        essay_id = str(evaluation_result.pop('essay_id', ''))
+        if essay_id not in expected or essay_id in results:
+            continue
+        evaluation_result['grade'] = grade_converter(evaluation_result.get('percentage', 0))
+        results[essay_id] = evaluation_result
+    return results
+
+def repair_evaluation(response_text, essay_text, rubric_data):
+    """Kesilmiş/bozuk yanıttan tamamlanmış alanları kurtar, eksik kriterleri kısa bir ek istekle tamamla
+
+    Tüm değerlendirme baştan yapılmaz; ek istek yalnızca yanıtta hiç ya da
+    eksik gelen kriterleri içerir. Toplam puan ve yüzde kriterlerden yeniden
+    hesaplanır.
+    """
+    partial, _ = parse_partial_json(response_text)
+    if not isinstance(partial, dict):
+        raise ValueError("Değerlendirme yanıtından kurtarılabilecek veri yok")
+
+    # Yalnızca rubrikte olan kriterler (her biri bir kez) toplama girer
+    rubric_keys = {_criterion_key(c['name']) for c in rubric_data['criteria']}
+    criteria_scores = []
+    found = set()
+    for criterion in partial.get('criteria_scores', []):
+        key = _criterion_key(criterion.get('name')) if isinstance(criterion, dict) else None
+        if key in rubric_keys and key not in found and _is_valid_criterion(criterion):
+            criteria_scores.append(criterion)
+            found.add(key)
+    missing = [c for c in rubric_data['criteria'] if _criterion_key(c['name']) not in found]
+
+    if missing:
+        _record_repair("followup_requests")
+        response = model.generate_content(
+            build_missing_criteria_prompt(essay_text, rubric_data, missing), generation_config=CRITERIA_CONFIG
+        )
+        try:
+            followup = decode_response_json(response.text)
+        except json.JSONDecodeError:
+            _record_parse("decode_errors")
+            raise
+        valid_followup = isinstance(followup, dict) and isinstance(followup.get('criteria_scores'), list)
+        _record_parse(None if valid_followup else "invalid_results")
+        for criterion in followup['criteria_scores'] if valid_followup else []:
+            key = _criterion_key(criterion.get('name')) if isinstance(criterion, dict) else None
+            if key in rubric_keys and key not in found and _is_valid_criterion(criterion):
+                criteria_scores.append(criterion)
+                found.add(key)
+
+        still_missing = [c['name'] for c in missing if _criterion_key(c['name']) not in found]
+        if still_missing:
+            raise ValueError(f"Eksik kriterler tamamlanamadı: {', '.join(still_missing)}")
+
+    total_score = sum(c['score'] for c in criteria_scores)
+    total_max_score = rubric_data['total_points']
+    percentage = min(100, max(0, total_score / total_max_score * 100)) if total_max_score else 0
+
+    evaluation_result = {
+        **partial,
+        "criteria_scores": criteria_scores,
+        "total_score": total_score,
+        "total_max_score": total_max_score,
+        "percentage": percentage,
+        "grade": grade_converter(percentage),
+    }
+    for field, default in (("general_feedback", ""), ("strengths", []), ("improvements", [])):
+        if not isinstance(evaluation_result.get(field), type(default)):
+            evaluation_result[field] = default
+
+    _record_repair("repaired")
+    return evaluation_result
+
+def add_text_statistics(evaluation_result, essay_text):
+    """Metin istatistiklerini modelden istemek yerine yerel olarak hesaplayıp sonuca ekle"""
+    evaluation_result['text_statistics'] = compute_text_statistics(essay_text)
+    return evaluation_result
+
+def assess_section(section_text, index, total, rubric_data):
+    """Tek bir bölümü incele; özet ve kriter notlarını döndür"""
+    response = model.generate_content(
+        build_section_prompt(section_text, index, total, rubric_data), generation_config=SECTION_CONFIG
+    )
+    outcome = None
+    try:
+        assessment = decode_response_json(response.text)
+    except ValueError:
+        outcome = "decode_errors"
+        assessment, _ = parse_partial_json(response.text)
+    if not isinstance(assessment, dict):
+        _record_parse(outcome or "invalid_results")
+        raise ValueError(f"{index}. bölümün incelemesi okunamadı")
+    _record_parse(outcome)
+    return assessment
+
+def evaluate_long_essay(essay_text, rubric_data):
+    """Token bütçesini aşan metni bölümlere ayırıp paralel incele, sonra tek bir rubrik geçişiyle puanla"""
+    sections = split_into_sections(essay_text)
+    workers = max(1, min(SECTION_MAX_WORKERS, len(sections)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="section") as executor:
+        assessments = list(executor.map(
+            lambda args: assess_section(*args),
+            [(section, i, len(sections), rubric_data) for i, section in enumerate(sections, 1)]
+        ))
+
+    essay_prompt = build_sections_prompt(assessments)
+    client, prompt = _evaluation_request(essay_prompt, rubric_data)
+    response = client.generate_content(prompt, generation_config=EVALUATION_CONFIG)
+    try:
+        evaluation_result = parse_evaluation_response(response.text)
+    except ValueError:
+        evaluation_result = repair_evaluation(response.text, essay_prompt, rubric_data)
+
+    evaluation_result['section_count'] = len(sections)
+    return add_text_statistics(evaluation_result, essay_text)
+
+def evaluate_essay(essay_text, rubric_data):
+    """Gemini AI ile essay değerlendirme
+
+    Streamlit'e bağımlı değildir; hatalar yakalanmadan çağırana iletilir, böylece
+    fonksiyon iş parçacıklarından ve ayrı süreçlerden güvenle çağrılabilir.
+    Token bütçesini aşan metinler bölüm bölüm değerlendirilir.
+    """
+    if needs_chunking(essay_text):
+        return evaluate_long_essay(essay_text, rubric_data)
+
+    client, prompt = _evaluation_request(build_essay_prompt(essay_text), rubric_data)
+    response = client.generate_content(prompt, generation_config=EVALUATION_CONFIG)
+    try:
+        evaluation_result = parse_evaluation_response(response.text)
+    except ValueError:
+        # JSONDecodeError da ValueError'dır; yanıt yeniden ücretlendirilmeden onarılır
+        evaluation_result = repair_evaluation(response.text, essay_text, rubric_data)
+    return add_text_statistics(evaluation_result, essay_text)
+
+def evaluate_essay_stream(essay_text, rubric_data, on_criterion=None):
+    """Değerlendirmeyi akış modunda al; her kriter tamamlandığı anda ``on_criterion`` çağrılır
+
+    Yanıt parçaları biriktirilip her parçada yarım JSON olarak çözülür, yeni
+    tamamlanan ``criteria_scores`` elemanları bildirilir. Sonuç ``evaluate_essay``
+    ile aynıdır.
+    """
+    if needs_chunking(essay_text):
+        # Bölüm bazlı değerlendirme akış modunu desteklemez; kriterler sonuçla birlikte bildirilir
+        evaluation_result = evaluate_long_essay(essay_text, rubric_data)
+        for criterion in evaluation_result['criteria_scores'] if on_criterion else []:
+            on_criterion(criterion)
+        return evaluation_result
+
+    client, prompt = _evaluation_request(build_essay_prompt(essay_text), rubric_data)
+    response_text = ""
+    emitted = 0
+
+    for chunk in client.generate_content_stream(prompt, generation_config=EVALUATION_CONFIG):
+        response_text += chunk.text
+        if on_criterion is None:
+            continue
+
+        partial, _ = parse_partial_json(response_text)
+        criteria_scores = partial.get('criteria_scores', []) if isinstance(partial, dict) else []
+        for criterion in criteria_scores[emitted:]:
+            if _is_valid_criterion(criterion):
+                on_criterion(criterion)
+        emitted = len(criteria_scores)
+
+    try:
+        evaluation_result = parse_evaluation_response(response_text)
+    except ValueError:
+        evaluation_result = repair_evaluation(response_text, essay_text, rubric_data)
+    return add_text_statistics(evaluation_result, essay_text)
+
+def is_packable(essay_text, max_words=PACKING_MAX_WORDS):
+    """Metin, paketleme modunda başka metinlerle birlikte değerlendirilecek kadar kısa mı"""
+    return len(essay_text.split()) <= max_words
+
+def evaluate_essays_packed(essay_texts, rubric_data):
+    """Kısa metinleri tek istekte değerlendir
+
+    Giriş sırasıyla ``(evaluation_result, error)`` listesi döndürür. Yanıtta
+    eksik ya da bozuk gelen metinler tek tek yeniden değerlendirilir.
+    """
+    essays = [(f"essay_{i}", essay_text) for i, essay_text in enumerate(essay_texts, 1)]
+
+    results = {}
+    if len(essays) > 1:
+        try:
+            response = model.generate_content(
+                build_packed_evaluation_prompt(essays, rubric_data), generation_config=PACKED_EVALUATION_CONFIG
+            )
+            results = parse_packed_evaluation_response(response.text, [essay_id for essay_id, _ in essays])
+        except Exception:
+            # Paket yanıtı hiç kullanılamazsa tüm metinler tekli değerlendirmeye düşer
+            results = {}
+
+    graded = []
+    for essay_id, essay_text in essays:
+        if essay_id in results:
+            graded.append((add_text_statistics(results[essay_id], essay_text), None))
+            continue
+        try:
+            graded.append((evaluate_essay(essay_text, rubric_data), None))
+        except Exception as e:
+            graded.append((None, e))
+    return graded
@@ -0,0 +1,210 @@
+import io
+import os
+import csv
+import json
+from datetime import datetime, date, time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Cursor'dan her seferde çekilecek belge sayısı
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+# PDF'te Türkçe karakterler için TrueType font (ör. DejaVuSans.ttf)
+EXPORT_PDF_FONT = os.getenv("EXPORT_PDF_FONT", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+
+EXPORT_FORMATS = ("csv", "jsonl", "xlsx", "pdf")
+
+BASE_FIELDS = {
+    "student_name": 1, "student_number": 1, "file_name": 1, "rubric_name": 1,
+    "assignment_title": 1, "total_score": 1, "percentage": 1, "grade": 1, "created_at": 1
+}
+DETAIL_FIELDS = {
+    "assignment_date": 1,
+    "evaluation_result.total_max_score": 1,
+    "evaluation_result.criteria_scores.name": 1,
+    "evaluation_result.criteria_scores.score": 1,
+    "evaluation_result.criteria_scores.max_score": 1
+}
+FEEDBACK_FIELDS = {
+    "evaluation_result.general_feedback": 1,
+    "evaluation_result.strengths": 1,
+    "evaluation_result.improvements": 1
+}
+
+def export_projection(include_details, include_feedback):
+    """Seçeneklere göre yalnızca gereken alanları içeren projeksiyon"""
+    projection = {"_id": 0, **BASE_FIELDS}
+    if include_details:
+        projection.update(DETAIL_FIELDS)
+    if include_feedback:
+        projection.update(FEEDBACK_FIELDS)
+    return projection
+
+def export_columns(include_details, include_feedback):
+    """Çıktı sütun başlıkları"""
+    columns = ["Öğrenci", "Numara", "Dosya", "Rubrik", "Ödev", "Puan", "Yüzde", "Not", "Tarih"]
+    if include_details:
+        columns += ["Ödev Tarihi", "Maks. Puan", "Kriter Puanları"]
+    if include_feedback:
+        columns += ["Genel Değerlendirme", "Güçlü Yönler", "Gelişim Önerileri"]
+    return columns
+
+def _format_date(value):
+    return value.strftime('%d.%m.%Y %H:%M') if isinstance(value, datetime) else (value or "")
+
+def flatten_evaluation(doc, include_details, include_feedback):
+    """Değerlendirme belgesini sütun sırasına göre düz bir satıra çevir"""
+    result = doc.get('evaluation_result', {})
+    row = [
+        doc.get('student_name', ""),
+        doc.get('student_number') or "",
+        doc.get('file_name', ""),
+        doc.get('rubric_name', ""),
+        doc.get('assignment_title') or "",
+        doc.get('total_score', 0),
+        round(doc.get('percentage', 0) or 0, 1),
+        doc.get('grade', ""),
+        _format_date(doc.get('created_at')),
+    ]
+    if include_details:
+        criteria = "; ".join(
+            f"{c.get('name')}: {c.get('score')}/{c.get('max_score')}"
+            for c in result.get('criteria_scores', [])
+        )
+        row += [_format_date(doc.get('assignment_date')), result.get('total_max_score', ""), criteria]
+    if include_feedback:
+        row += [
+            result.get('general_feedback', ""),
+            " | ".join(result.get('strengths', [])),
+            " | ".join(result.get('improvements', [])),
+        ]
+    return row
+
+def open_export_cursor(db, start_date, end_date, include_details, include_feedback):
+    """Tarih aralığındaki değerlendirmeler için parça parça okunan cursor"""
+    query = {"created_at": {
+        "$gte": datetime.combine(start_date, time.min),
+        "$lte": datetime.combine(end_date, time.max)
+    }}
+    return (
+        db.evaluations.find(query, export_projection(include_details, include_feedback))
+        .sort("created_at", 1)
+        .batch_size(EXPORT_BATCH_SIZE)
+    )
+
+def write_csv(cursor, fileobj, include_details, include_feedback):
+    """CSV'yi parça parça yaz (Excel uyumluluğu için UTF-8 BOM ile)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(export_columns(include_details, include_feedback))
+    fileobj.write(b'\xef\xbb\xbf')
+
+    count = 0
+    for doc in cursor:
+        writer.writerow(flatten_evaluation(doc, include_details, include_feedback))
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            fileobj.write(buffer.getvalue().encode('utf-8'))
+            buffer.seek(0)
+            buffer.truncate()
+
+    fileobj.write(buffer.getvalue().encode('utf-8'))
+    return count
+
+def write_jsonl(cursor, fileobj, include_details, include_feedback):
+    """Her değerlendirmeyi ayrı bir JSON satırı olarak yaz"""
+    columns = export_columns(include_details, include_feedback)
+    count = 0
+    for doc in cursor:
+        row = dict(zip(columns, flatten_evaluation(doc, include_details, include_feedback)))
+        fileobj.write((json.dumps(row, ensure_ascii=False) + "\n").encode('utf-8'))
+        count += 1
+    return count
+
+def write_xlsx(cursor, fileobj, include_details, include_feedback):
+    """openpyxl write-only modu ile satırları belleğe almadan XLSX yaz"""
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ImportError("Excel export için 'openpyxl' paketi gerekli: pip install openpyxl")
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Değerlendirmeler")
+    sheet.append(export_columns(include_details, include_feedback))
+    count = 0
+    for doc in cursor:
+        sheet.append(flatten_evaluation(doc, include_details, include_feedback))
+        count += 1
+    workbook.save(fileobj)
+    return count
+
+def write_pdf(cursor, fileobj, include_details, include_feedback):
+    """reportlab ile sayfa sayfa PDF yaz; her değerlendirme bir blok olarak çizilir"""
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+    except ImportError:
+        raise ImportError("PDF export için 'reportlab' paketi gerekli: pip install reportlab")
+
+    font = "Helvetica"
+    if os.path.exists(EXPORT_PDF_FONT):
+        pdfmetrics.registerFont(TTFont("ExportFont", EXPORT_PDF_FONT))
+        font = "ExportFont"
+
+    pdf = canvas.Canvas(fileobj, pagesize=A4)
+    width, height = A4
+    margin = 40
+    line_height = 13
+    max_chars = 100
+    y = height - margin
+
+    def draw_line(text, size=9):
+        nonlocal y
+        if y < margin:
+            pdf.showPage()
+            y = height - margin
+        pdf.setFont(font, size)
+        pdf.drawString(margin, y, text)
+        y -= line_height
+
+    draw_line(f"Değerlendirme Raporu - {date.today().strftime('%d.%m.%Y')}", size=14)
+    y -= line_height
+
+    columns = export_columns(include_details, include_feedback)
+    count = 0
+    for doc in cursor:
+        for column, value in zip(columns, flatten_evaluation(doc, include_details, include_feedback)):
+            text = f"{column}: {value}"
+            for start in range(0, max(len(text), 1), max_chars):
+                draw_line(text[start:start + max_chars])
+        y -= line_height / 2
+        count += 1
+
+    pdf.save()
+    return count
+
+WRITERS = {
+    "csv": write_csv,
+    "jsonl": write_jsonl,
+    "xlsx": write_xlsx,
+    "pdf": write_pdf,
+}
+
+def export_evaluations(db, export_format, start_date, end_date, fileobj,
+                       include_details=True, include_feedback=False):
+    """Tarih aralığındaki değerlendirmeleri seçilen formatta dosyaya akıt
+
+    Belgeler cursor'dan ``EXPORT_BATCH_SIZE``'lık parçalarla okunur ve hemen
+    yazılır; bellek kullanımı satır sayısından bağımsızdır. Yazılan satır
+    sayısını döndürür.
+    """
+    if export_format not in WRITERS:
+        raise ValueError(f"Desteklenmeyen export formatı: {export_format}")
+
+    cursor = open_export_cursor(db, start_date, end_date, include_details, include_feedback)
+    try:
+        return WRITERS[export_format](cursor, fileobj, include_details, include_feedback)
+    finally:
+        cursor.close()
@@ -0,0 +1,277 @@
+import os
+import time
+import random
+import threading
+from datetime import timedelta
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from dotenv import load_dotenv
+
+from token_budget import estimate_tokens
+
+load_dotenv()
+
+# Gemini API'yi yapılandır
+genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+
+# Kota ayarları (bu süreç için; birden fazla çalışan süreç varsa kota aralarında paylaştırılmalı)
+GEMINI_RPM_LIMIT = int(os.getenv("GEMINI_RPM_LIMIT", "15"))
+GEMINI_TPM_LIMIT = int(os.getenv("GEMINI_TPM_LIMIT", "1000000"))
+
+# Yeniden deneme ve zaman aşımı ayarları
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "5"))
+GEMINI_BACKOFF_BASE_SECONDS = float(os.getenv("GEMINI_BACKOFF_BASE_SECONDS", "1"))
+GEMINI_BACKOFF_MAX_SECONDS = float(os.getenv("GEMINI_BACKOFF_MAX_SECONDS", "60"))
+GEMINI_REQUEST_TIMEOUT = float(os.getenv("GEMINI_REQUEST_TIMEOUT", "120"))
+
+# Rubrik/talimat öneklerinin Gemini context cache'te tutulması
+GEMINI_CONTEXT_CACHE_ENABLED = os.getenv("GEMINI_CONTEXT_CACHE_ENABLED", "true").lower() == "true"
+GEMINI_CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "900"))
+# Modelin önbelleğe almayı kabul ettiği en küçük içerik; daha kısa önekler için denenmez.
+# Hazır rubriklerin önekleri ~350–560 token olduğundan tipik kullanımda önbellek devreye
+# girmez; yalnızca çok kriterli/uzun açıklamalı rubriklerde etkilidir
+GEMINI_CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+# Süresi dolmak üzere olan önbellek yerine yenisi oluşturulur
+CONTEXT_CACHE_REFRESH_MARGIN_SECONDS = 30
+
+# Yanıt gelmeden önce istek için ayrılan tahmini çıktı token'ı
+GEMINI_OUTPUT_TOKEN_RESERVE = int(os.getenv("GEMINI_OUTPUT_TOKEN_RESERVE", "1024"))
+
+# Kota ve geçici sunucu hataları yeniden denenir; diğer hatalar hemen iletilir
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+)
+
+class TokenBucket:
+    """Dakikalık kapasiteyi sürekli dolduran token kovası"""
+
+    def __init__(self, capacity_per_minute):
+        self.capacity = float(capacity_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount):
+        """``amount`` kadar token için beklenmesi gereken süre (refill sonrası çağrılmalı)"""
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+class RateLimiter:
+    """İstek/dakika ve token/dakika kotalarını birlikte uygulayan, iş parçacığı güvenli sınırlayıcı"""
+
+    def __init__(self, rpm=GEMINI_RPM_LIMIT, tpm=GEMINI_TPM_LIMIT):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._lock = threading.Lock()
+        self.total_requests = 0
+        self.total_tokens = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttled_seconds = 0.0
+        self.backoff_seconds = 0.0
+
+    def acquire(self, estimated_tokens):
+        """Her iki kovada yer açılana kadar bekle ve isteği düş"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.requests.refill(now)
+                self.tokens.refill(now)
+                delay = max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+                if delay <= 0:
+                    self.requests.tokens -= 1
+                    self.tokens.tokens -= min(estimated_tokens, self.tokens.capacity)
+                    self.total_requests += 1
+                    self.throttled_seconds += waited
+                    return waited
+            time.sleep(delay)
+            waited += delay
+
+    def settle(self, estimated_tokens, actual_tokens):
+        """Yanıttaki gerçek token kullanımına göre tahmini düzelt (kova eksiye düşebilir)"""
+        with self._lock:
+            self.tokens.tokens -= actual_tokens - min(estimated_tokens, self.tokens.capacity)
+            self.total_tokens += actual_tokens
+
+    def record_retry(self, delay):
+        with self._lock:
+            self.retries += 1
+            self.backoff_seconds += delay
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def stats(self):
+        """Sınırlayıcı durumu: kalan kota ve toplam sayaçlar"""
+        with self._lock:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                "rpm_limit": int(self.requests.capacity),
+                "tpm_limit": int(self.tokens.capacity),
+                "available_requests": max(0, int(self.requests.tokens)),
+                "available_tokens": max(0, int(self.tokens.tokens)),
+                "total_requests": self.total_requests,
+                "total_tokens": self.total_tokens,
+                "retries": self.retries,
+                "failures": self.failures,
+                "throttled_seconds": self.throttled_seconds,
+                "backoff_seconds": self.backoff_seconds,
+            }
+
+# Süreçteki tüm modeller aynı kotayı paylaşır
+limiter = RateLimiter()
+
+def backoff_delay(attempt):
+    """Tam jitter'lı üstel bekleme süresi"""
+    return random.uniform(0, min(GEMINI_BACKOFF_MAX_SECONDS, GEMINI_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+class GeminiClient:
+    """GenerativeModel sarmalayıcısı: kota sınırlama, zaman aşımı ve üstel geri çekilmeyle yeniden deneme"""
+
+    def __init__(self, model_name, rate_limiter=None, max_retries=GEMINI_MAX_RETRIES,
+                 timeout=GEMINI_REQUEST_TIMEOUT, model=None):
+        self.model_name = model_name
+        self.model = model or genai.GenerativeModel(model_name)
+        self.limiter = rate_limiter or limiter
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._prefix_clients = {}
+        self._prefix_key_locks = {}
+        self._prefix_lock = threading.Lock()
+
+    def with_cached_prefix(self, cache_key, prefix):
+        """Sabit prompt önekini Gemini context cache'e koy ve bu öneki kullanan bir istemci döndür
+
+        Dönen istemciye yalnızca önekten sonra gelen içerik gönderilir. Önbellek
+        kapalıysa, önek modelin alt sınırından kısaysa ya da oluşturma başarısız
+        olursa None döner ve çağıran tam prompt ile devam eder. Başarısızlık da
+        TTL boyunca hatırlanır, her istekte yeniden denenmez.
+        """
+        if not GEMINI_CONTEXT_CACHE_ENABLED or estimate_tokens(prefix) < GEMINI_CONTEXT_CACHE_MIN_TOKENS:
+            return None
+
+        with self._prefix_lock:
+            entry = self._prefix_clients.get(cache_key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            key_lock = self._prefix_key_locks.setdefault(cache_key, threading.Lock())
+
+        # Ağ çağrısı yalnızca aynı önek için bekleyenleri durdurur, diğer istekler sürer
+        with key_lock:
+            with self._prefix_lock:
+                entry = self._prefix_clients.get(cache_key)
+                if entry and entry[0] > time.monotonic():
+                    return entry[1]
+
+            try:
+                cached_content = genai.caching.CachedContent.create(
+                    model=self.model_name if self.model_name.startswith("models/") else f"models/{self.model_name}",
+                    display_name=f"rubric-{cache_key[:32]}",
+                    contents=[prefix],
+                    ttl=timedelta(seconds=GEMINI_CONTEXT_CACHE_TTL_SECONDS)
+                )
+                client = GeminiClient(
+                    self.model_name, self.limiter, self.max_retries, self.timeout,
+                    model=genai.GenerativeModel.from_cached_content(cached_content)
+                )
+            except Exception:
+                client = None
+
+            expires_at = time.monotonic() + GEMINI_CONTEXT_CACHE_TTL_SECONDS - CONTEXT_CACHE_REFRESH_MARGIN_SECONDS
+            with self._prefix_lock:
+                self._prefix_clients[cache_key] = (expires_at, client)
+            return client
+
+    def generate_content(self, contents, **kwargs):
+        """``GenerativeModel.generate_content`` ile aynı; yeniden denenebilir hatalarda bekleyip tekrar dener"""
+        estimated_tokens = estimate_tokens(contents) + GEMINI_OUTPUT_TOKEN_RESERVE
+        request_options = {"timeout": self.timeout, **kwargs.pop("request_options", {})}
+
+        attempt = 0
+        while True:
+            self.limiter.acquire(estimated_tokens)
+            try:
+                response = self.model.generate_content(contents, request_options=request_options, **kwargs)
+            except RETRYABLE_ERRORS:
+                if attempt >= self.max_retries:
+                    self.limiter.record_failure()
+                    raise
+                delay = backoff_delay(attempt)
+                self.limiter.record_retry(delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            self._settle_usage(response, estimated_tokens)
+            return response
+
+    def generate_content_stream(self, contents, **kwargs):
+        """``stream=True`` ile yanıt parçalarını üret
+
+        Yeniden deneme yalnızca ilk parça gelmeden oluşan hatalarda yapılır;
+        akış başladıktan sonraki hata çağırana iletilir.
+        """
+        estimated_tokens = estimate_tokens(contents) + GEMINI_OUTPUT_TOKEN_RESERVE
+        request_options = {"timeout": self.timeout, **kwargs.pop("request_options", {})}
+
+        attempt = 0
+        while True:
+            self.limiter.acquire(estimated_tokens)
+            started = False
+            try:
+                response = self.model.generate_content(
+                    contents, stream=True, request_options=request_options, **kwargs
+                )
+                for chunk in response:
+                    started = True
+                    yield chunk
+            except RETRYABLE_ERRORS:
+                if started or attempt >= self.max_retries:
+                    self.limiter.record_failure()
+                    raise
+                delay = backoff_delay(attempt)
+                self.limiter.record_retry(delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            self._settle_usage(response, estimated_tokens)
+            return
+
+    def _settle_usage(self, response, estimated_tokens):
+        usage = getattr(response, "usage_metadata", None)
+        actual_tokens = getattr(usage, "total_token_count", 0) if usage else 0
+        if actual_tokens:
+            self.limiter.settle(estimated_tokens, actual_tokens)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client(model_name):
+    """Model adı başına tek bir GeminiClient"""
+    with _clients_lock:
+        if model_name not in _clients:
+            _clients[model_name] = GeminiClient(model_name)
+        return _clients[model_name]
+
+def json_generation_config(response_schema):
+    """Yanıtın verilen şemaya uyan JSON olmasını isteyen üretim ayarı"""
+    return genai.GenerationConfig(response_mime_type="application/json", response_schema=response_schema)
+
+def limiter_stats():
+    """Süreç genelindeki kota sınırlayıcının durumu"""
+    return limiter.stats()
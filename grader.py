@@ -1,13 +1,53 @@
-import google.generativeai as genai
-import os
+import json
+from functools import lru_cache
+from typing import TypedDict
 from dotenv import load_dotenv
-import re
+
+from gemini_client import get_client, json_generation_config
+from text_statistics import compute_text_statistics
 
 load_dotenv()
 
-# Gemini API'yi yapılandır
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel('gemini-1.5-flash')
+# Gemini istemcisi; kota aşımı ve geçici hatalar istemci içinde yeniden denenir
+model = get_client('gemini-1.5-flash')
+
+# Birleşik analizde seçilebilen bölümler
+ANALYSIS_SECTIONS = ("evaluation", "quality", "suggestions")
+
+class CriterionFeedback(TypedDict):
+    criterion: str
+    score: float
+    justification: str
+    suggestion: str
+
+class RubricEvaluation(TypedDict):
+    criteria: list[CriterionFeedback]
+    total_score: float
+    general_feedback: str
+    key_improvements: list[str]
+
+class QualityAnalysis(TypedDict):
+    grammar_spelling: int
+    structure_flow: int
+    content_richness: int
+    readability: int
+    total_score: int
+    strengths: list[str]
+    weaknesses: list[str]
+    summary: str
+
+class ImprovementSuggestions(TypedDict):
+    structure: str
+    content: str
+    language_use: str
+    grammar_spelling: str
+    general_writing: str
+
+SECTION_SCHEMAS = {
+    "evaluation": RubricEvaluation,
+    "quality": QualityAnalysis,
+    "suggestions": ImprovementSuggestions,
+}
 
 def evaluate_essay(essay_text, rubrik):
     """Detaylı rubrik ile essay değerlendirme"""
@@ -70,23 +110,11 @@ def analyze_text_quality(essay_text):
         return f"Hata oluştu: {str(e)}"
 
 def get_essay_statistics(essay_text):
-    """Metin istatistikleri hesapla"""
+    """Metin istatistikleri hesapla (tek geçişte, Ateşman okunabilirliği dahil)"""
     if not essay_text:
         return {}
     
-    words = essay_text.split()
-    sentences = re.split(r'[.!?]+', essay_text)
-    paragraphs = essay_text.split('\n\n')
-    
-    stats = {
-        'word_count': len(words),
-        'sentence_count': len([s for s in sentences if s.strip()]),
-        'paragraph_count': len([p for p in paragraphs if p.strip()]),
-        'char_count': len(essay_text),
-        'avg_words_per_sentence': round(len(words) / max(len([s for s in sentences if s.strip()]), 1), 1)
-    }
-    
-    return stats
+    return compute_text_statistics(essay_text)
 
 def suggest_improvements(essay_text):
     """Gelişim önerileri üret"""
@@ -112,6 +140,67 @@ def suggest_improvements(essay_text):
     except Exception as e:
         return f"Hata oluştu: {str(e)}"
 
+SECTION_INSTRUCTIONS = {
+    "evaluation": """"evaluation": Metni verilen kriterlere göre değerlendir. Her kriter için verdiğin puanı,
+    gerekçesini ve bir gelişim önerisini yaz; toplam puanı hesapla, genel değerlendirme yap ve
+    3 ana gelişim önerisi ver.""",
+    "quality": """"quality": Metnin genel kalitesini hızlıca analiz et: dil bilgisi ve yazım, metin yapısı ve akış,
+    içerik zenginliği, genel okunabilirlik (her biri 0-25 puan), toplam puan (0-100),
+    2 güçlü yön, 2 gelişim alanı ve kısa bir genel yorum.""",
+    "suggestions": """"suggestions": Öğrenciye yapı, içerik, dil kullanımı, yazım/dilbilgisi ve genel yazma becerisi
+    ile ilgili birer kısa ve uygulanabilir gelişim önerisi ver.""",
+}
+
+@lru_cache(maxsize=None)
+def _analysis_config(sections):
+    """Yalnızca seçilen bölümleri içeren yanıt şeması; kullanılmayan bölümler çıktı token'ı harcamaz"""
+    schema = TypedDict("CombinedAnalysis", {section: SECTION_SCHEMAS[section] for section in sections})
+    return json_generation_config(schema)
+
+def build_analysis_prompt(essay_text, rubrik, sections):
+    """Seçilen bölümler için tek bir analiz prompt'u oluştur"""
+    instructions = "\n\n    ".join(SECTION_INSTRUCTIONS[section] for section in sections)
+    criteria = f"""
+    DEĞERLENDIRME KRİTERLERİ:
+    {rubrik}
+""" if "evaluation" in sections else ""
+
+    return f"""
+    Sen deneyimli bir öğretmensin. Aşağıdaki öğrenci yazısını analiz et ve yalnızca istenen bölümleri içeren
+    bir JSON nesnesi döndür.
+{criteria}
+    ÖĞRENCİ METNİ:
+    {essay_text}
+
+    İSTENEN BÖLÜMLER:
+    {instructions}
+
+    Analizini profesyonel ve yapıcı bir dilde yap.
+    """
+
+def analyze_essay(essay_text, rubrik=None, sections=None):
+    """Rubrik değerlendirmesi, kalite analizi ve gelişim önerilerini tek istekte üret
+
+    ``sections`` ile istenen bölümler seçilir ("evaluation", "quality",
+    "suggestions"); verilmezse girdisi olan bölümler üretilir, yani rubrik
+    yoksa değerlendirme bölümü atlanır. Metin yalnızca bir kez gönderilir. Bölüm
+    adlarıyla anahtarlanmış bir sözlük, hata durumunda ``{"error": "Hata oluştu: ..."}`` döndürür.
+    """
+    if sections is None:
+        sections = ANALYSIS_SECTIONS if rubrik else ("quality", "suggestions")
+    sections = tuple(section for section in ANALYSIS_SECTIONS if section in sections)
+    if not sections:
+        return {}
+    if "evaluation" in sections and not rubrik:
+        return {"error": "Hata oluştu: Değerlendirme bölümü için rubrik gerekli"}
+
+    prompt = build_analysis_prompt(essay_text, rubrik, sections)
+    try:
+        response = model.generate_content(prompt, generation_config=_analysis_config(sections))
+        return json.loads(response.text)
+    except Exception as e:
+        return {"error": f"Hata oluştu: {str(e)}"}
+
 def grade_converter(score, total=100):
     """Puanı harf notuna çevir"""
     percentage = (score / total) * 100
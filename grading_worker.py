@@ -0,0 +1,109 @@
+import os
+import signal
+import socket
+import threading
+from dotenv import load_dotenv
+
+from evaluator import evaluate_essay, MODEL_NAME
+from evaluation_cache import EvaluationCache, evaluate_with_cache
+from single_flight import EvaluationLease, EVALUATION_LEASE_ENABLED
+from evaluation_writer import build_evaluation_data, write_evaluations, ensure_idempotency_index
+from job_queue import (
+    ensure_job_indexes, claim_job, complete_job, fail_job, JobHeartbeat,
+    JOB_MAX_ATTEMPTS, STATUS_QUEUED
+)
+from mongo_client import get_db
+from report_stats import ensure_report_stats
+
+load_dotenv()
+
+# Bir çalışan sürecin aynı anda işleyeceği iş sayısı
+WORKER_CONCURRENCY = int(os.getenv("GRADING_WORKER_CONCURRENCY", "2"))
+# Kuyruk boşken yeni iş için bekleme süresi (saniye)
+WORKER_POLL_INTERVAL = float(os.getenv("GRADING_WORKER_POLL_INTERVAL", "2"))
+
+def process_job(db, cache, job):
+    """Tek bir işi puanla ve sonucu kaydet; (değerlendirme _id'si, önbellek isabeti) döndür"""
+    rubric_data = job['rubric']
+    evaluation_result, cache_hit = evaluate_with_cache(
+        cache, job['essay_text'], rubric_data, MODEL_NAME, evaluate_essay
+    )
+    # Ödev tarihi verilmediyse "şimdi" yerine işin oluşturulma zamanı kullanılır;
+    # böylece tekrar denenen iş aynı idempotency_key'i üretir
+    metadata = dict(job.get('metadata') or {})
+    metadata['assignment_date'] = metadata.get('assignment_date') or job.get('created_at')
+    evaluation_data = build_evaluation_data(
+        rubric_data, job['file_name'], job['essay_text'], evaluation_result, **metadata
+    )
+
+    # Yazma idempotent olduğundan yarıda kalıp tekrar alınan iş ikinci kayıt oluşturmaz;
+    # bu durumda kaydedilmiş belgenin _id'si rapordaki duplicates listesinden alınır
+    report = write_evaluations(db.evaluations, [evaluation_data])
+    if report["failed"]:
+        raise Exception(report["failed"][0][1])
+    stored = (report["inserted"] or report["duplicates"])[0]
+    return stored['_id'], cache_hit
+
+def run_worker(db, cache, worker_id, stop_event):
+    """Kuyruk boşalana kadar iş al, boşken bekle; stop_event ile durur"""
+    while not stop_event.is_set():
+        job = claim_job(db, worker_id)
+        if job is None:
+            stop_event.wait(WORKER_POLL_INTERVAL)
+            continue
+
+        if job['attempts'] > JOB_MAX_ATTEMPTS:
+            fail_job(db, job, job.get('error') or "Deneme sınırı aşıldı")
+            print(f"❌ [{worker_id}] {job['file_name']}: deneme sınırı aşıldı")
+            continue
+
+        try:
+            # Kilit iş bitene kadar uzatılır; uzun işler başka çalışana geçmez
+            with JobHeartbeat(db, job):
+                evaluation_id, cache_hit = process_job(db, cache, job)
+        except Exception as e:
+            status = fail_job(db, job, e)
+            retry = " (tekrar denenecek)" if status == STATUS_QUEUED else ""
+            print(f"❌ [{worker_id}] {job['file_name']}: {e}{retry}")
+            continue
+
+        if complete_job(db, job, evaluation_id, cache_hit):
+            source = " (önbellekten)" if cache_hit else ""
+            print(f"✅ [{worker_id}] {job['file_name']} değerlendirildi{source}")
+        else:
+            print(f"ℹ️ [{worker_id}] {job['file_name']} başka bir çalışan tarafından devralınmıştı")
+
+if __name__ == "__main__":
+    db = get_db()
+    ensure_job_indexes(db)
+    ensure_idempotency_index(db.evaluations)
+    ensure_report_stats(db)
+    lease = EvaluationLease(db.evaluation_leases) if EVALUATION_LEASE_ENABLED else None
+    cache = EvaluationCache(db.evaluation_cache, lease=lease)
+    cache.ensure_indexes()
+    if lease:
+        lease.ensure_indexes()
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+
+    host = f"{socket.gethostname()}:{os.getpid()}"
+    threads = [
+        threading.Thread(target=run_worker, args=(db, cache, f"{host}:{i}", stop_event), name=f"grading-worker-{i}")
+        for i in range(max(1, WORKER_CONCURRENCY))
+    ]
+
+    print(f"🚀 Değerlendirme çalışanı başlatıldı ({len(threads)} iş parçacığı, model: {MODEL_NAME})")
+    for thread in threads:
+        thread.start()
+
+    try:
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=1)
+    except KeyboardInterrupt:
+        stop_event.set()
+        print("⏹️ Çalışan durduruluyor, devam eden işler tamamlanıyor...")
+        for thread in threads:
+            thread.join()
+    print("👋 Çalışan durdu.")
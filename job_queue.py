@@ -0,0 +1,168 @@
+import os
+import uuid
+import threading
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.errors import PyMongoError
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Bir çalışanın üstlendiği iş bu süre içinde bitmezse başka çalışan devralabilir
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+# Çalışan iş sürerken kilidi bu aralıkla uzatır (kilit süresinden kısa olmalı)
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", str(JOB_LEASE_SECONDS / 3)))
+# Geçici hatalarda bir işin en fazla kaç kez deneneceği
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Hatalı iş tekrar alınmadan önce beklenecek süre; her denemede ikiye katlanır
+JOB_RETRY_BACKOFF_SECONDS = int(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "30"))
+JOB_RETRY_BACKOFF_MAX_SECONDS = int(os.getenv("JOB_RETRY_BACKOFF_MAX_SECONDS", "900"))
+# Biten işlerin jobs koleksiyonunda tutulacağı süre
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+JOB_INDEXES = [
+    IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+    IndexModel([("batch_id", ASCENDING), ("created_at", ASCENDING)], name="batch_id_created_at"),
+    IndexModel([("finished_at", ASCENDING)], name="finished_at_ttl", expireAfterSeconds=JOB_RETENTION_SECONDS),
+]
+
+# Durum ekranında gösterilen alanlar; öğrenci metni ve rubrik taşınmaz
+JOB_STATUS_FIELDS = {
+    "file_name": 1, "status": 1, "attempts": 1, "error": 1,
+    "evaluation_id": 1, "cache_hit": 1, "created_at": 1, "finished_at": 1
+}
+
+def ensure_job_indexes(db):
+    """İş kuyruğu indekslerini oluştur"""
+    return db.jobs.create_indexes(JOB_INDEXES)
+
+def enqueue_grading_batch(db, rubric_data, items, metadata):
+    """Dosyaları tek bir toplu iş olarak kuyruğa ekle ve batch_id döndür
+
+    ``items`` ``(dosya_adı, metin)`` çiftleridir. Rubrik işe kopyalanır; iş
+    beklerken rubrik düzenlense bile öğretmenin seçtiği hali ile puanlanır.
+    """
+    batch_id = uuid.uuid4().hex
+    now = datetime.now()
+    jobs = [
+        {
+            "batch_id": batch_id,
+            "status": STATUS_QUEUED,
+            "rubric": rubric_data,
+            "file_name": file_name,
+            "essay_text": essay_text,
+            "metadata": metadata,
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now
+        }
+        for file_name, essay_text in items
+    ]
+    if jobs:
+        db.jobs.insert_many(jobs, ordered=True)
+    return batch_id
+
+def claim_job(db, worker_id, lease_seconds=JOB_LEASE_SECONDS):
+    """Sıradaki işi (veya süresi dolmuş bir işi) atomik olarak üstlen; iş yoksa None"""
+    now = datetime.now()
+    return db.jobs.find_one_and_update(
+        {"$or": [
+            # Hata sonrası geri çekilme süresi dolmamış işler atlanır
+            {"status": STATUS_QUEUED, "not_before": {"$not": {"$gt": now}}},
+            {"status": STATUS_RUNNING, "lease_expires_at": {"$lt": now}}
+        ]},
+        {
+            "$set": {
+                "status": STATUS_RUNNING,
+                "worker_id": worker_id,
+                "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                "updated_at": now
+            },
+            "$unset": {"not_before": ""},
+            "$inc": {"attempts": 1}
+        },
+        sort=[("created_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+def renew_job_lease(db, job, lease_seconds=JOB_LEASE_SECONDS):
+    """Çalışan işin kilidini uzat; iş başka çalışana geçtiyse False"""
+    now = datetime.now()
+    return db.jobs.update_one(
+        {"_id": job['_id'], "worker_id": job['worker_id'], "status": STATUS_RUNNING},
+        {"$set": {"lease_expires_at": now + timedelta(seconds=lease_seconds), "updated_at": now}}
+    ).matched_count == 1
+
+class JobHeartbeat:
+    """İş sürdüğü müddetçe kilidi arka planda uzatan bağlam yöneticisi
+
+    Uzun süren işler (bölümlere ayrılan metinler, kota beklemeleri) kilit süresini
+    aşsa bile başka bir çalışan tarafından devralınıp ikinci kez puanlanmaz.
+    """
+
+    def __init__(self, db, job, interval=JOB_HEARTBEAT_SECONDS, lease_seconds=JOB_LEASE_SECONDS):
+        self.db = db
+        self.job = job
+        self.interval = interval
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-heartbeat-{job['_id']}", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                # İş başka çalışana geçtiyse uzatmayı bırak; complete_job zaten reddedilir
+                if not renew_job_lease(self.db, self.job, self.lease_seconds):
+                    return
+            except PyMongoError:
+                # Geçici bağlantı hatası; kilit süresi dolmadan tekrar denenir
+                continue
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+def complete_job(db, job, evaluation_id, cache_hit=False):
+    """İşi tamamlandı olarak işaretle; metin artık değerlendirmeyle saklandığından silinir"""
+    now = datetime.now()
+    return db.jobs.update_one(
+        {"_id": job['_id'], "worker_id": job['worker_id']},
+        {
+            "$set": {
+                "status": STATUS_DONE,
+                "evaluation_id": evaluation_id,
+                "cache_hit": cache_hit,
+                "finished_at": now,
+                "updated_at": now
+            },
+            "$unset": {"essay_text": "", "lease_expires_at": "", "error": ""}
+        }
+    ).modified_count == 1
+
+def fail_job(db, job, error, max_attempts=JOB_MAX_ATTEMPTS):
+    """Hatalı işi deneme hakkı kaldıysa kuyruğa geri koy, yoksa başarısız say"""
+    now = datetime.now()
+    update = {"$set": {"error": str(error), "updated_at": now}, "$unset": {"lease_expires_at": ""}}
+    if job.get('attempts', 0) < max_attempts:
+        backoff = min(JOB_RETRY_BACKOFF_MAX_SECONDS, JOB_RETRY_BACKOFF_SECONDS * 2 ** max(0, job.get('attempts', 1) - 1))
+        update["$set"]["status"] = STATUS_QUEUED
+        update["$set"]["not_before"] = now + timedelta(seconds=backoff)
+    else:
+        update["$set"]["status"] = STATUS_FAILED
+        update["$set"]["finished_at"] = now
+    db.jobs.update_one({"_id": job['_id'], "worker_id": job['worker_id']}, update)
+    return update["$set"]["status"]
+
+def get_batch_jobs(db, batch_id):
+    """Toplu işteki dosyaların durumu, kuyruğa eklenme sırasıyla"""
+    return list(db.jobs.find({"batch_id": batch_id}, JOB_STATUS_FIELDS).sort("created_at", ASCENDING))
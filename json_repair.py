@@ -0,0 +1,128 @@
+import re
+import json
+
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_LITERALS = {"true": True, "false": False, "null": None}
+
+class _PartialParser:
+    """Yarıda kesilmiş JSON'u okuyabildiği yere kadar çözen ayrıştırıcı
+
+    Her değer ``(değer, tamamlandı_mı)`` olarak döner. Yarım kalan nesnelerde
+    tamamlanmış anahtar/değer çiftleri (ve yarım kalan iç dizi/nesne), dizilerde
+    yalnızca tamamlanmış elemanlar tutulur. Sözdizimi hatası görülen yer de
+    kesilme noktası sayılır.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def skip_whitespace(self):
+        while self.pos < len(self.text) and self.text[self.pos] in " \t\r\n":
+            self.pos += 1
+
+    def peek(self):
+        self.skip_whitespace()
+        return self.text[self.pos] if self.pos < len(self.text) else None
+
+    def value(self):
+        char = self.peek()
+        if char is None:
+            return None, False
+        if char == "{":
+            return self.object()
+        if char == "[":
+            return self.array()
+        if char == '"':
+            return self.string()
+        return self.scalar()
+
+    def object(self):
+        result = {}
+        self.pos += 1
+        while True:
+            char = self.peek()
+            if char == "}":
+                self.pos += 1
+                return result, True
+            if char == ",":
+                self.pos += 1
+                continue
+            if char != '"':
+                return result, False
+
+            key, complete = self.string()
+            if not complete or self.peek() != ":":
+                return result, False
+            self.pos += 1
+
+            value, complete = self.value()
+            if not complete:
+                # Yarım kalan dizi/nesne içindeki tamamlanmış kısımlarla tutulur
+                if isinstance(value, (dict, list)):
+                    result[key] = value
+                return result, False
+            result[key] = value
+
+    def array(self):
+        result = []
+        self.pos += 1
+        while True:
+            char = self.peek()
+            if char == "]":
+                self.pos += 1
+                return result, True
+            if char == ",":
+                self.pos += 1
+                continue
+            if char is None:
+                return result, False
+
+            value, complete = self.value()
+            if not complete:
+                return result, False
+            result.append(value)
+
+    def string(self):
+        start = self.pos
+        self.pos += 1
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if char == "\\":
+                self.pos += 2
+                continue
+            self.pos += 1
+            if char == '"':
+                try:
+                    return json.loads(self.text[start:self.pos]), True
+                except json.JSONDecodeError:
+                    return None, False
+        return None, False
+
+    def scalar(self):
+        for literal, value in _LITERALS.items():
+            if self.text.startswith(literal, self.pos):
+                self.pos += len(literal)
+                return value, True
+
+        match = _NUMBER.match(self.text, self.pos)
+        # Metnin sonuna dayanan sayı yarım kalmış olabilir (ör. 12 yerine 125)
+        if not match or match.end() >= len(self.text.rstrip()):
+            return None, False
+        self.pos = match.end()
+        number = match.group()
+        return (float(number) if any(c in number for c in ".eE") else int(number)), True
+
+def parse_partial_json(text):
+    """JSON'u kesildiği yere kadar çöz; ``(değer, tamamlandı_mı)`` döndür
+
+    Metin ilk ``{`` veya ``[`` karakterinden itibaren okunur. Hiç değer
+    çıkarılamazsa ``(None, False)`` döner.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return None, False
+
+    parser = _PartialParser(text)
+    parser.pos = min(starts)
+    return parser.value()
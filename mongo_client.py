@@ -0,0 +1,124 @@
+import os
+import threading
+from pymongo import MongoClient, monitoring
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# MongoDB Atlas bağlantı ayarları (.env üzerinden değiştirilebilir)
+MONGO_URI = os.getenv('MONGO_URI')
+MONGO_DB_NAME = os.getenv('MONGO_DB_NAME', 'essay_grader')
+MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', '50'))
+MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', '0'))
+MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', '60000'))
+WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', '10000'))
+SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '10000'))
+CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', '10000'))
+SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', '20000'))
+RETRY_WRITES = os.getenv('MONGO_RETRY_WRITES', 'true').lower() in ('1', 'true', 'yes')
+RETRY_READS = os.getenv('MONGO_RETRY_READS', 'true').lower() in ('1', 'true', 'yes')
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Bağlantı havuzu olaylarını sayarak kullanım istatistiği tutar"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open_connections = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections = max(self.open_connections - 1, 0)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "max_pool_size": MAX_POOL_SIZE,
+                "open_connections": self.open_connections,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "utilization": self.in_use / MAX_POOL_SIZE if MAX_POOL_SIZE else 0,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "pool_clears": self.pool_clears,
+            }
+
+_pool_listener = PoolStatsListener()
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Süreç genelinde paylaşılan MongoClient'ı döndür (ilk çağrıda oluşturulur)"""
+    global _client
+
+    if _client is not None:
+        return _client
+
+    with _client_lock:
+        if _client is None:
+            if not MONGO_URI:
+                raise Exception("⚠️ .env dosyasında MONGO_URI değişkeni tanımlı değil!")
+
+            _client = MongoClient(
+                MONGO_URI,
+                maxPoolSize=MAX_POOL_SIZE,
+                minPoolSize=MIN_POOL_SIZE,
+                maxIdleTimeMS=MAX_IDLE_TIME_MS,
+                waitQueueTimeoutMS=WAIT_QUEUE_TIMEOUT_MS,
+                serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS,
+                connectTimeoutMS=CONNECT_TIMEOUT_MS,
+                socketTimeoutMS=SOCKET_TIMEOUT_MS,
+                retryWrites=RETRY_WRITES,
+                retryReads=RETRY_READS,
+                event_listeners=[_pool_listener]
+            )
+    return _client
+
+def get_db():
+    """Uygulama veritabanını döndür"""
+    return get_client()[MONGO_DB_NAME]
+
+def pool_stats():
+    """Bağlantı havuzu kullanım istatistikleri"""
+    return _pool_listener.snapshot()
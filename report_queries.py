@@ -0,0 +1,129 @@
+import re
+
+# Rapor sayfalarının gösterdiği alanlar; öğrenci metni ve model çıktısı taşınmaz
+RECENT_EVALUATION_FIELDS = {
+    "file_name": 1, "student_name": 1, "rubric_name": 1,
+    "grade": 1, "percentage": 1, "created_at": 1
+}
+
+STUDENT_EVALUATION_FIELDS = {
+    "file_name": 1, "rubric_name": 1, "grade": 1, "percentage": 1, "total_score": 1,
+    "created_at": 1, "assignment_title": 1, "essay_text_id": 1, "essay_storage": 1,
+    "evaluation_result.criteria_scores.name": 1,
+    "evaluation_result.criteria_scores.score": 1,
+    "evaluation_result.criteria_scores.max_score": 1
+}
+
+STUDENT_PAGE_FIELDS = {
+    "total_evaluations": 1, "avg_score": 1, "max_score": 1,
+    "min_score": 1, "latest_date": 1, "student_numbers": 1
+}
+
+def get_recent_evaluations(db, limit=5):
+    """Son değerlendirmeler (yalnızca listede gösterilen alanlar)"""
+    return list(db.evaluations.find({}, RECENT_EVALUATION_FIELDS).sort("created_at", -1).limit(limit))
+
+def get_student_evaluations(db, student_name, limit=0):
+    """Öğrencinin değerlendirmeleri, en yeni önce; metin gövdesi hariç"""
+    cursor = db.evaluations.find({"student_name": student_name}, STUDENT_EVALUATION_FIELDS).sort("created_at", -1)
+    if limit:
+        cursor = cursor.limit(limit)
+    return list(cursor)
+
+def get_student_page(db, page_size, after=None, search=None):
+    """student_stats üzerinde ortalamaya göre sıralı, anahtar tabanlı (keyset) sayfa
+
+    ``after`` bir önceki sayfanın son satırının ``(avg_score, _id)`` çiftidir.
+    Sonraki sayfanın olup olmadığını anlamak için ``page_size + 1`` satır döner.
+    """
+    conditions = [{"_id": {"$nin": [None, "Anonim"]}}]
+
+    if search:
+        search = search.strip()
+        conditions.append({"$or": [
+            {"_id": {"$regex": f"^{re.escape(search)}", "$options": "i"}},
+            {"student_numbers": search}
+        ]})
+
+    if after is not None:
+        last_avg, last_id = after
+        conditions.append({"$or": [
+            {"avg_score": {"$lt": last_avg}},
+            {"avg_score": last_avg, "_id": {"$gt": last_id}}
+        ]})
+
+    cursor = (
+        db.student_stats.find({"$and": conditions}, STUDENT_PAGE_FIELDS)
+        .sort([("avg_score", -1), ("_id", 1)])
+        .limit(page_size + 1)
+    )
+    return list(cursor)
+
+def get_student_stats(db, student_name):
+    """Tek öğrencinin özet istatistikleri"""
+    return db.student_stats.find_one({"_id": student_name}, STUDENT_PAGE_FIELDS)
+
+def get_rubric_usage_stats(db):
+    """Tüm rubriklerin kullanım sayısı ve ortalama puanını tek sorguda getir
+
+    ``{rubric_id: {"count": ..., "avg_score": ...}}`` sözlüğü döndürür.
+    """
+    pipeline = [
+        {"$group": {
+            "_id": "$rubric_id",
+            "count": {"$sum": 1},
+            "avg_score": {"$avg": "$total_score"}
+        }}
+    ]
+    return {
+        usage['_id']: {"count": usage['count'], "avg_score": usage['avg_score']}
+        for usage in db.evaluations.aggregate(pipeline)
+    }
+
+def get_rubric_score_summary(db, rubric_name, success_threshold=60):
+    """Seçili rubrikle yapılan değerlendirmelerin sayı, ortalama, başarı ve en yüksek puanı"""
+    pipeline = [
+        {"$match": {"rubric_name": rubric_name}},
+        {"$group": {
+            "_id": None,
+            "count": {"$sum": 1},
+            "avg_score": {"$avg": "$percentage"},
+            "max_score": {"$max": "$percentage"},
+            "success_count": {"$sum": {"$cond": [{"$gte": ["$percentage", success_threshold]}, 1, 0]}}
+        }}
+    ]
+    result = list(db.evaluations.aggregate(pipeline))
+    return result[0] if result else None
+
+def get_criterion_stats(db, rubric_name):
+    """Kriter bazlı başarı dağılımını (ortalama, p25, medyan, p75) sunucuda hesapla
+
+    Yalnızca ``evaluation_result.criteria_scores`` alanı işlenir; öğrenci metinleri
+    ve model çıktısının geri kalanı veritabanından çıkmaz.
+    ``{kriter_adı: {"count", "avg", "p25", "median", "p75"}}`` döndürür.
+    """
+    ratio = {"$divide": ["$criteria_scores.score", "$criteria_scores.max_score"]}
+    pipeline = [
+        {"$match": {"rubric_name": rubric_name}},
+        {"$project": {"_id": 0, "criteria_scores": "$evaluation_result.criteria_scores"}},
+        {"$unwind": "$criteria_scores"},
+        {"$match": {"criteria_scores.max_score": {"$gt": 0}}},
+        {"$group": {
+            "_id": "$criteria_scores.name",
+            "count": {"$sum": 1},
+            "avg": {"$avg": ratio},
+            "percentiles": {"$percentile": {"input": ratio, "p": [0.25, 0.5, 0.75], "method": "approximate"}}
+        }}
+    ]
+
+    stats = {}
+    for criterion in db.evaluations.aggregate(pipeline):
+        p25, median, p75 = criterion['percentiles']
+        stats[criterion['_id']] = {
+            "count": criterion['count'],
+            "avg": criterion['avg'],
+            "p25": p25,
+            "median": median,
+            "p75": p75,
+        }
+    return stats
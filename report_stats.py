@@ -0,0 +1,271 @@
+from collections import defaultdict
+from datetime import datetime, time
+from pymongo import UpdateOne, UpdateMany
+
+from mongo_client import get_db
+
+# Başarılı sayılan en düşük yüzde
+SUCCESS_THRESHOLD = 60
+
+GLOBAL_STATS_ID = "global"
+# Özetlerin evaluations koleksiyonundan baştan hesaplandığını gösteren şema sürümü
+REPORT_STATS_VERSION = 1
+
+# Trend grafiği için desteklenen zaman aralıkları
+TREND_GRANULARITIES = ("day", "week", "term")
+
+def _rubric_stats_id(rubric_name):
+    return f"rubric:{rubric_name}"
+
+def record_evaluations(db, evaluations):
+    """Yeni yazılan değerlendirmeleri özet istatistiklere $inc ile ekle
+
+    Yalnızca ilk kez eklenen değerlendirmeler için çağrılmalıdır; tekrar eden
+    yazmalar sayılmaz. Geçmiş veriler henüz özetlenmediyse hiçbir şey yapılmaz;
+    bu değerlendirmeler yeniden hesaplamada zaten sayılacaktır.
+    """
+    if not evaluations or not is_backfilled(db):
+        return
+
+    global_inc = defaultdict(int)
+    rubric_incs = defaultdict(lambda: defaultdict(int))
+    daily_incs = defaultdict(lambda: defaultdict(int))
+    student_ops = []
+
+    for evaluation_data in evaluations:
+        percentage = evaluation_data.get('percentage', 0) or 0
+        success = 1 if percentage >= SUCCESS_THRESHOLD else 0
+
+        global_inc['total_evaluations'] += 1
+        global_inc['sum_percentage'] += percentage
+        global_inc['success_count'] += success
+        global_inc[f"grade_counts.{evaluation_data.get('grade', 'N/A')}"] += 1
+
+        rubric_inc = rubric_incs[evaluation_data.get('rubric_name')]
+        rubric_inc['total_uses'] += 1
+        rubric_inc['sum_percentage'] += percentage
+        rubric_inc['sum_total_score'] += evaluation_data.get('total_score', 0) or 0
+        rubric_inc['success_count'] += success
+
+        created_at = evaluation_data.get('created_at')
+        if created_at:
+            daily_inc = daily_incs[datetime.combine(created_at.date(), time.min)]
+            daily_inc['count'] += 1
+            daily_inc['sum_percentage'] += percentage
+
+        update = {
+            "$inc": {"total_evaluations": 1, "sum_percentage": percentage},
+            "$max": {"max_score": percentage, "latest_date": evaluation_data.get('created_at')},
+            "$min": {"min_score": percentage},
+        }
+        if evaluation_data.get('student_number'):
+            update["$addToSet"] = {"student_numbers": evaluation_data['student_number']}
+        student_ops.append(UpdateOne({"_id": evaluation_data.get('student_name')}, update, upsert=True))
+
+    # Ortalamalar sıralanabilmesi için her güncellemeden sonra yeniden hesaplanır
+    student_ops.append(UpdateMany(
+        {"_id": {"$in": list({e.get('student_name') for e in evaluations})}},
+        [{"$set": {"avg_score": {"$divide": ["$sum_percentage", "$total_evaluations"]}}}]
+    ))
+    student_result = db.student_stats.bulk_write(student_ops, ordered=True)
+    global_inc['student_count'] += student_result.upserted_count
+
+    stats_ops = [UpdateOne({"_id": GLOBAL_STATS_ID}, {"$inc": dict(global_inc)}, upsert=True)]
+    for rubric_name, rubric_inc in rubric_incs.items():
+        stats_ops.append(UpdateOne(
+            {"_id": _rubric_stats_id(rubric_name)},
+            {"$inc": dict(rubric_inc), "$set": {"rubric_name": rubric_name}},
+            upsert=True
+        ))
+    db.report_stats.bulk_write(stats_ops, ordered=False)
+
+    if daily_incs:
+        db.daily_stats.bulk_write([
+            UpdateOne({"_id": day}, {"$inc": dict(daily_inc)}, upsert=True)
+            for day, daily_inc in daily_incs.items()
+        ], ordered=False)
+
+def rebuild_report_stats(db):
+    """Özet istatistikleri evaluations koleksiyonundan baştan hesapla (geçmiş veri için)
+
+    Hesaplama sürerken yazılan değerlendirmeler özetlerde eksik kalabilir; elle
+    yeniden hesaplama yoğun olmayan bir zamanda çalıştırılmalıdır.
+    """
+    success_expr = {"$cond": [{"$gte": ["$percentage", SUCCESS_THRESHOLD]}, 1, 0]}
+
+    # Öğrenci özetleri
+    db.evaluations.aggregate([
+        {"$group": {
+            "_id": "$student_name",
+            "total_evaluations": {"$sum": 1},
+            "sum_percentage": {"$sum": "$percentage"},
+            "max_score": {"$max": "$percentage"},
+            "min_score": {"$min": "$percentage"},
+            "latest_date": {"$max": "$created_at"},
+            "student_numbers": {"$addToSet": "$student_number"}
+        }},
+        {"$set": {
+            "avg_score": {"$divide": ["$sum_percentage", "$total_evaluations"]},
+            "student_numbers": {"$filter": {"input": "$student_numbers", "cond": {"$ne": ["$$this", None]}}}
+        }},
+        {"$out": "student_stats"}
+    ])
+
+    # Günlük trend kovaları
+    db.evaluations.aggregate([
+        {"$match": {"created_at": {"$type": "date"}}},
+        {"$group": {
+            "_id": {"$dateTrunc": {"date": "$created_at", "unit": "day"}},
+            "count": {"$sum": 1},
+            "sum_percentage": {"$sum": "$percentage"}
+        }},
+        {"$out": "daily_stats"}
+    ])
+
+    totals = list(db.evaluations.aggregate([
+        {"$group": {
+            "_id": None,
+            "total_evaluations": {"$sum": 1},
+            "sum_percentage": {"$sum": "$percentage"},
+            "success_count": {"$sum": success_expr}
+        }}
+    ]))
+    grade_counts = {
+        g['_id'] if g['_id'] is not None else 'N/A': g['count']
+        for g in db.evaluations.aggregate([{"$group": {"_id": "$grade", "count": {"$sum": 1}}}])
+    }
+    rubric_stats = list(db.evaluations.aggregate([
+        {"$group": {
+            "_id": "$rubric_name",
+            "total_uses": {"$sum": 1},
+            "sum_percentage": {"$sum": "$percentage"},
+            "sum_total_score": {"$sum": "$total_score"},
+            "success_count": {"$sum": success_expr}
+        }}
+    ]))
+
+    global_stats = {
+        "_id": GLOBAL_STATS_ID,
+        "total_evaluations": totals[0]['total_evaluations'] if totals else 0,
+        "sum_percentage": totals[0]['sum_percentage'] if totals else 0,
+        "success_count": totals[0]['success_count'] if totals else 0,
+        "grade_counts": grade_counts,
+        "student_count": db.student_stats.count_documents({}),
+        "schema_version": REPORT_STATS_VERSION,
+        "rebuilt_at": datetime.now(),
+    }
+
+    # Belgeler silinmeden yerinde değiştirilir; eşzamanlı $inc upsert'leriyle çakışmaz.
+    # Sürüm işareti taşıyan genel belge en son yazılır, artımlı sayım ancak o zaman başlar
+    rubric_ids = []
+    for r in rubric_stats:
+        rubric_id = _rubric_stats_id(r['_id'])
+        rubric_ids.append(rubric_id)
+        db.report_stats.replace_one(
+            {"_id": rubric_id},
+            {**r, "_id": rubric_id, "rubric_name": r['_id']},
+            upsert=True
+        )
+    db.report_stats.delete_many({"_id": {"$regex": "^rubric:", "$nin": rubric_ids}})
+    db.report_stats.replace_one({"_id": GLOBAL_STATS_ID}, global_stats, upsert=True)
+    return global_stats
+
+def is_backfilled(db):
+    """Özetler geçmiş değerlendirmeleri de içerecek şekilde oluşturulmuş mu"""
+    stats = db.report_stats.find_one({"_id": GLOBAL_STATS_ID}, {"schema_version": 1})
+    return stats is not None and stats.get('schema_version', 0) >= REPORT_STATS_VERSION
+
+def ensure_report_stats(db):
+    """Özetler hiç oluşturulmadıysa ya da eski sürümdeyse baştan hesapla; genel özet belgesini döndür"""
+    stats = db.report_stats.find_one({"_id": GLOBAL_STATS_ID})
+    if stats is None or stats.get('schema_version', 0) < REPORT_STATS_VERSION:
+        stats = rebuild_report_stats(db)
+    return stats
+
+def get_report_summary(db):
+    """Genel rapor özetini tek belgeden oku
+
+    Özet henüz oluşturulmadıysa evaluations koleksiyonundan bir kez oluşturulur.
+    """
+    stats = ensure_report_stats(db)
+
+    total = stats.get('total_evaluations', 0)
+    grade_counts = stats.get('grade_counts', {})
+    return {
+        "total_evaluations": total,
+        "student_count": stats.get('student_count', 0),
+        "avg_percentage": stats.get('sum_percentage', 0) / total if total else 0,
+        "success_rate": stats.get('success_count', 0) / total if total else 0,
+        "grade_distribution": [
+            {"_id": grade, "count": grade_counts[grade]}
+            for grade in sorted(grade_counts) if grade_counts[grade]
+        ],
+    }
+
+def get_rubric_summaries(db, limit=0):
+    """Rubrik bazlı kullanım özetleri, en çok kullanılan önce"""
+    cursor = db.report_stats.find({"_id": {"$regex": "^rubric:"}}).sort("total_uses", -1)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    summaries = []
+    for stats in cursor:
+        total = stats.get('total_uses', 0)
+        summaries.append({
+            "_id": stats['rubric_name'],
+            "total_uses": total,
+            "avg_score": stats.get('sum_percentage', 0) / total if total else 0,
+            "success_rate": stats.get('success_count', 0) / total if total else 0,
+        })
+    return summaries
+
+def _term_start_expr(date_expr):
+    """Tarihin ait olduğu eğitim dönemi başlangıcı (Eylül–Ocak, Şubat–Haziran, Temmuz–Ağustos yaz)"""
+    year = {"$year": date_expr}
+    month = {"$month": date_expr}
+    return {"$switch": {
+        "branches": [
+            {"case": {"$gte": [month, 9]}, "then": {"$dateFromParts": {"year": year, "month": 9, "day": 1}}},
+            {"case": {"$eq": [month, 1]}, "then": {"$dateFromParts": {"year": {"$subtract": [year, 1]}, "month": 9, "day": 1}}},
+            {"case": {"$lte": [month, 6]}, "then": {"$dateFromParts": {"year": year, "month": 2, "day": 1}}},
+        ],
+        "default": {"$dateFromParts": {"year": year, "month": 7, "day": 1}}
+    }}
+
+def get_score_trend(db, since, granularity="day"):
+    """Günlük kovalardan seçilen aralıkta (gün/hafta/dönem) ortalama başarı trendi
+
+    ``[{"period": datetime, "count": ..., "avg_score": ...}]`` listesi döndürür.
+    """
+    if granularity not in TREND_GRANULARITIES:
+        raise ValueError(f"Geçersiz zaman aralığı: {granularity}")
+
+    if granularity == "day":
+        period_expr = "$_id"
+    elif granularity == "week":
+        period_expr = {"$dateTrunc": {"date": "$_id", "unit": "week", "startOfWeek": "monday"}}
+    else:
+        period_expr = _term_start_expr("$_id")
+
+    pipeline = [
+        {"$match": {"_id": {"$gte": datetime.combine(since.date(), time.min)}}},
+        {"$group": {
+            "_id": period_expr,
+            "count": {"$sum": "$count"},
+            "sum_percentage": {"$sum": "$sum_percentage"}
+        }},
+        {"$sort": {"_id": 1}}
+    ]
+    return [
+        {
+            "period": bucket['_id'],
+            "count": bucket['count'],
+            "avg_score": bucket['sum_percentage'] / bucket['count'] if bucket['count'] else 0
+        }
+        for bucket in db.daily_stats.aggregate(pipeline)
+    ]
+
+if __name__ == "__main__":
+    print("🚀 Rapor istatistikleri yeniden oluşturuluyor...")
+    stats = rebuild_report_stats(get_db())
+    print(f"✅ {stats['total_evaluations']} değerlendirme, {stats['student_count']} öğrenci özetlendi.")
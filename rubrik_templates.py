@@ -1,25 +1,8 @@
-from pymongo import MongoClient
 from datetime import datetime
-import os
-from dotenv import load_dotenv
+from mongo_client import get_db
 
-load_dotenv()
-
-# MongoDB Atlas bağlantısı
-MONGO_URI = os.getenv('MONGO_URI')
-
-if not MONGO_URI:
-    raise Exception("⚠️ .env dosyasında MONGO_URI değişkeni tanımlı değil!")
-
-client = MongoClient(
-    MONGO_URI,
-    serverSelectionTimeoutMS=5000,
-    connectTimeoutMS=5000,
-    socketTimeoutMS=5000,
-    maxPoolSize=1
-)
-
-db = client['essay_grader']  # Veritabanı adı
+# MongoDB Atlas bağlantısı (paylaşılan istemci)
+db = get_db()
 
 def create_template_rubrics():
     """Hazır rubrik şablonlarını MongoDB Atlas’a ekler"""
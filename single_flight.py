@@ -0,0 +1,138 @@
+import os
+import copy
+import uuid
+import socket
+import threading
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Süreçler arası kilitleme isteğe bağlıdır (birden fazla grading_worker çalışırken açılması önerilir)
+EVALUATION_LEASE_ENABLED = os.getenv("EVALUATION_LEASE_ENABLED", "false").lower() == "true"
+# Kilit sahibi süreç çökerse başkasının devralabilmesi için kilit süresi
+EVALUATION_LEASE_SECONDS = int(os.getenv("EVALUATION_LEASE_SECONDS", "180"))
+# Başka süreçteki değerlendirmenin bitmesi beklenirken sonuç kontrol aralığı
+EVALUATION_LEASE_POLL_SECONDS = float(os.getenv("EVALUATION_LEASE_POLL_SECONDS", "1"))
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Aynı anahtarla eşzamanlı yapılan çağrıları süreç içinde tek bir çağrıda birleştirir"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """Anahtar için devam eden çağrı varsa onun sonucunu bekle, yoksa ``fn``'i çalıştır
+
+        ``(sonuç, paylaşıldı_mı)`` döndürür. Bekleyenler sonucun kopyasını alır;
+        ``fn`` hata verirse aynı hata bekleyen tüm çağıranlara iletilir.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result), True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        """Şu anda devam eden çağrı sayısı"""
+        with self._lock:
+            return len(self._calls)
+
+class EvaluationLease:
+    """Süreçler arası tek değerlendirme için MongoDB'de süreli kilit belgesi"""
+
+    def __init__(self, collection, lease_seconds=EVALUATION_LEASE_SECONDS, poll_seconds=EVALUATION_LEASE_POLL_SECONDS):
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.owner_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    def ensure_indexes(self):
+        """Süresi dolan kilitleri MongoDB'nin silmesi için TTL indeksi"""
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def acquire(self, key):
+        """Kilidi almayı dene; alınırsa sahip kimliğini, alınamazsa None döndür"""
+        owner = f"{self.owner_prefix}:{uuid.uuid4().hex}"
+        now = datetime.now()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        try:
+            self.collection.insert_one({"_id": key, "owner": owner, "expires_at": expires_at})
+            return owner
+        except DuplicateKeyError:
+            pass
+
+        # Sahibi çökmüş (süresi dolmuş) kilit devralınır
+        taken = self.collection.find_one_and_update(
+            {"_id": key, "expires_at": {"$lt": now}},
+            {"$set": {"owner": owner, "expires_at": expires_at}}
+        )
+        return owner if taken else None
+
+    def release(self, key, owner):
+        try:
+            self.collection.delete_one({"_id": key, "owner": owner})
+        except PyMongoError:
+            pass
+
+    def wait(self, key):
+        """Kilit bırakılana ya da süresi dolana kadar bir kontrol aralığı bekle; kilit hâlâ duruyorsa True"""
+        threading.Event().wait(self.poll_seconds)
+        try:
+            doc = self.collection.find_one({"_id": key}, {"expires_at": 1})
+        except PyMongoError:
+            return False
+        return doc is not None and doc['expires_at'] >= datetime.now()
+
+def run_leased(lease, key, lookup, fn):
+    """Süreçler arası kilitle çalıştır: başka süreç aynı anahtarı işliyorsa sonucunu bekle
+
+    ``lookup`` paylaşılan sonucu (ör. önbellekten) getirir, yoksa None döndürür.
+    ``(sonuç, paylaşıldı_mı)`` döndürür.
+    """
+    while True:
+        result = lookup()
+        if result is not None:
+            return result, True
+
+        try:
+            owner = lease.acquire(key)
+        except PyMongoError:
+            # Kilit koleksiyonuna ulaşılamıyorsa tekrar eden çağrıya razı olunur
+            return fn(), False
+
+        if owner is not None:
+            try:
+                return fn(), False
+            finally:
+                lease.release(key, owner)
+
+        while lease.wait(key):
+            result = lookup()
+            if result is not None:
+                return result, True
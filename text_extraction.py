@@ -0,0 +1,118 @@
+import io
+import os
+import hashlib
+import docx
+import PyPDF2
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SUPPORTED_EXTENSIONS = ['pdf', 'doc', 'docx', 'txt']
+
+# Çok büyük dosyaların oturumu kilitlememesi için sınırlar
+MAX_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", "200"))
+MAX_CHARS = int(os.getenv("EXTRACTION_MAX_CHARS", "500000"))
+
+# Bu sayfa sayısının üzerindeki PDF'ler süreç havuzunda paralel okunur
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("EXTRACTION_PARALLEL_PAGE_THRESHOLD", "40"))
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+class ExtractionLimitError(Exception):
+    """Dosya sayfa veya karakter sınırını aştığında fırlatılır"""
+
+def file_extension(file_name):
+    """Dosya uzantısını küçük harfle döndür"""
+    return file_name.split('.')[-1].lower()
+
+def file_digest(data):
+    """Dosya içeriğinin SHA-256 özeti"""
+    return hashlib.sha256(data).hexdigest()
+
+def _extract_page_range(data, start, stop):
+    """Süreç havuzu işçisi: PDF'in [start, stop) aralığındaki sayfaların metni"""
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return [(pdf_reader.pages[i].extract_text() or "") for i in range(start, stop)]
+
+def iter_pdf_pages(data, max_pages=None):
+    """PDF sayfalarının metnini sırayla üret
+
+    Sayfa sınırı metin çıkarılmadan önce kontrol edilir. Büyük dosyalarda
+    sayfa aralıkları süreç havuzuna dağıtılır, sonuçlar yine sayfa sırasıyla döner.
+    """
+    max_pages = max_pages or MAX_PAGES
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(data))
+    page_count = len(pdf_reader.pages)
+
+    if page_count > max_pages:
+        raise ExtractionLimitError(f"PDF {page_count} sayfa, en fazla {max_pages} sayfa destekleniyor")
+
+    if page_count < PARALLEL_PAGE_THRESHOLD or EXTRACTION_WORKERS < 2:
+        for page in pdf_reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    chunk_size = -(-page_count // EXTRACTION_WORKERS)
+    ranges = [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+
+    executor = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS)
+    try:
+        page_batches = executor.map(
+            _extract_page_range,
+            [data] * len(ranges),
+            [start for start, _ in ranges],
+            [stop for _, stop in ranges]
+        )
+        for batch in page_batches:
+            yield from batch
+    finally:
+        # Karakter sınırı aşılırsa bekleyen sayfa aralıkları iptal edilir
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def iter_docx_paragraphs(data):
+    """DOCX paragraflarının metnini sırayla üret"""
+    doc = docx.Document(io.BytesIO(data))
+    for paragraph in doc.paragraphs:
+        yield paragraph.text
+
+def join_limited(chunks, max_chars=None):
+    """Parçaları satır sonlarıyla tek seferde birleştir, karakter sınırı aşılırsa dur"""
+    max_chars = max_chars or MAX_CHARS
+    parts = []
+    total_chars = 0
+
+    for chunk in chunks:
+        total_chars += len(chunk) + 1
+        if total_chars > max_chars:
+            raise ExtractionLimitError(f"Metin {max_chars} karakter sınırını aşıyor")
+        parts.append(chunk)
+
+    if not parts:
+        return ""
+    return "\n".join(parts) + "\n"
+
+def extract_text(file_name, data, max_pages=None, max_chars=None):
+    """Dosya içeriğinden (bytes) metin çıkarma
+
+    Desteklenmeyen uzantılarda None döner, okuma hataları ve
+    ``ExtractionLimitError`` çağırana iletilir.
+    """
+    extension = file_extension(file_name)
+    max_chars = max_chars or MAX_CHARS
+
+    if extension == 'txt':
+        if len(data) > max_chars * 4:
+            raise ExtractionLimitError(f"Metin {max_chars} karakter sınırını aşıyor")
+        text = data.decode('utf-8')
+        if len(text) > max_chars:
+            raise ExtractionLimitError(f"Metin {max_chars} karakter sınırını aşıyor")
+        return text
+
+    elif extension == 'pdf':
+        return join_limited(iter_pdf_pages(data, max_pages=max_pages), max_chars=max_chars)
+
+    elif extension in ['doc', 'docx']:
+        return join_limited(iter_docx_paragraphs(data), max_chars=max_chars)
+
+    else:
+        return None
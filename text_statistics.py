@@ -0,0 +1,86 @@
+VOWELS = frozenset("aeıioöuüâîûAEIİOÖUÜÂÎÛ")
+SENTENCE_TERMINATORS = frozenset(".!?…")
+# Kelime içinde kalan işaretler (ör. "Ankara'ya", "sosyo-ekonomik")
+WORD_JOINERS = frozenset("'’-")
+
+def atesman_score(word_count, sentence_count, syllable_count):
+    """Ateşman okunabilirlik puanı: 198.825 − 40.175 × (hece/kelime) − 2.610 × (kelime/cümle)"""
+    if not word_count:
+        return 0.0
+    score = 198.825 - 40.175 * (syllable_count / word_count) - 2.610 * (word_count / max(sentence_count, 1))
+    return round(max(0.0, min(100.0, score)), 1)
+
+def readability_level(score):
+    """Ateşman puanını kolay/orta/zor düzeyine çevir (70+ kolay, 50–69 orta, altı zor)"""
+    if score >= 70:
+        return "kolay"
+    if score >= 50:
+        return "orta"
+    return "zor"
+
+def compute_text_statistics(text):
+    """Kelime, cümle, paragraf, hece sayıları ve Ateşman okunabilirliğini tek geçişte hesapla
+
+    Türkçede her hece tek bir ünlü içerdiğinden hece sayısı ünlü sayısıdır.
+    Paragraflar boş satırlarla ayrılır; metinde hiç boş satır yoksa (ör. DOCX
+    çıktısı) her dolu satır bir paragraf sayılır.
+    """
+    text = text or ""
+    word_count = sentence_count = syllable_count = 0
+    blank_separated_paragraphs = line_paragraphs = 0
+
+    in_word = False
+    sentence_open = False
+    line_open = False
+    block_open = False
+    saw_blank_line = False
+    newline_run = 0
+
+    for char in text:
+        if char.isalnum():
+            if not in_word:
+                word_count += 1
+                in_word = True
+            if char in VOWELS:
+                syllable_count += 1
+            sentence_open = True
+            if not line_open:
+                line_paragraphs += 1
+                line_open = True
+            if not block_open:
+                blank_separated_paragraphs += 1
+                block_open = True
+            newline_run = 0
+            continue
+
+        if char in WORD_JOINERS and in_word:
+            continue
+        in_word = False
+
+        if char in SENTENCE_TERMINATORS:
+            if sentence_open:
+                sentence_count += 1
+                sentence_open = False
+        elif char == "\n":
+            line_open = False
+            newline_run += 1
+            if newline_run >= 2:
+                block_open = False
+                saw_blank_line = True
+        elif not char.isspace():
+            newline_run = 0
+
+    if sentence_open:
+        sentence_count += 1
+
+    score = atesman_score(word_count, sentence_count, syllable_count)
+    return {
+        "word_count": word_count,
+        "sentence_count": sentence_count,
+        "paragraph_count": blank_separated_paragraphs if saw_blank_line else line_paragraphs,
+        "char_count": len(text),
+        "syllable_count": syllable_count,
+        "avg_words_per_sentence": round(word_count / max(sentence_count, 1), 1),
+        "atesman_score": score,
+        "readability": readability_level(score),
+    }
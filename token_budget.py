@@ -0,0 +1,118 @@
+import os
+import re
+import math
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Kaba token tahmini için ortalama karakter/token oranı
+CHARS_PER_TOKEN = 4
+
+# Tek istekte gönderilecek öğrenci metni için token bütçesi; aşan metinler bölümlere ayrılır
+ESSAY_TOKEN_BUDGET = int(os.getenv("ESSAY_TOKEN_BUDGET", "24000"))
+# Bölüm bazlı değerlendirmede her bölümün en fazla token'ı
+SECTION_TOKEN_BUDGET = int(os.getenv("SECTION_TOKEN_BUDGET", "8000"))
+
+# Tahmini çıktı token'ları
+EVALUATION_OUTPUT_TOKENS = int(os.getenv("EVALUATION_OUTPUT_TOKENS", "1200"))
+SECTION_OUTPUT_TOKENS = int(os.getenv("SECTION_OUTPUT_TOKENS", "600"))
+
+# Maliyet ve süre tahmini (1M token başına USD, istek başına ortalama süre)
+GEMINI_INPUT_PRICE_PER_MILLION = float(os.getenv("GEMINI_INPUT_PRICE_PER_MILLION", "0.10"))
+GEMINI_OUTPUT_PRICE_PER_MILLION = float(os.getenv("GEMINI_OUTPUT_PRICE_PER_MILLION", "0.40"))
+GEMINI_AVG_LATENCY_SECONDS = float(os.getenv("GEMINI_AVG_LATENCY_SECONDS", "8"))
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+")
+
+def estimate_tokens(contents):
+    """İstek içeriği için kaba token tahmini (karakter / 4)"""
+    if isinstance(contents, (list, tuple)):
+        return sum(estimate_tokens(part) for part in contents)
+    return max(1, len(str(contents)) // CHARS_PER_TOKEN)
+
+def needs_chunking(essay_text, budget=ESSAY_TOKEN_BUDGET):
+    """Metin tek istekte gönderilemeyecek kadar uzun mu"""
+    return estimate_tokens(essay_text) > budget
+
+def _split_oversized(block, max_tokens):
+    """Bütçeyi aşan paragrafı cümlelere, gerekirse karakter sınırına göre böl"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    for sentence in _SENTENCE_BOUNDARY.split(block):
+        for start in range(0, len(sentence), max_chars):
+            yield sentence[start:start + max_chars]
+
+def split_into_sections(essay_text, max_tokens=SECTION_TOKEN_BUDGET):
+    """Metni paragraf sınırlarını koruyarak en fazla ``max_tokens``'lık bölümlere ayır"""
+    blocks = [b.strip() for b in re.split(r"\n\s*\n", essay_text) if b.strip()]
+    if len(blocks) <= 1:
+        # Boş satır yoksa (ör. DOCX çıktısı) satırlar paragraf sayılır
+        blocks = [line.strip() for line in essay_text.splitlines() if line.strip()]
+
+    sections = []
+    current = []
+    current_tokens = 0
+    for block in blocks:
+        pieces = [block] if estimate_tokens(block) <= max_tokens else list(_split_oversized(block, max_tokens))
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece)
+            if current and current_tokens + piece_tokens > max_tokens:
+                sections.append("\n\n".join(current))
+                current = []
+                current_tokens = 0
+            current.append(piece)
+            current_tokens += piece_tokens
+
+    if current:
+        sections.append("\n\n".join(current))
+    return sections
+
+def estimate_cost(input_tokens, output_tokens):
+    """Token sayılarından tahmini maliyet (USD)"""
+    return (input_tokens * GEMINI_INPUT_PRICE_PER_MILLION + output_tokens * GEMINI_OUTPUT_PRICE_PER_MILLION) / 1_000_000
+
+def estimate_batch(essay_texts, prefix_tokens, pack_size=1, is_packable=None, max_workers=1, rpm_limit=None):
+    """Toplu değerlendirme için istek, token, maliyet ve süre tahmini
+
+    ``prefix_tokens`` rubrik ve talimat önekinin token sayısıdır. Uzun metinler
+    için bölüm istekleri ve birleştirme isteği, paketleme açıksa paket
+    istekleri hesaba katılır. Önbellek isabetleri ve context cache indirimi
+    dikkate alınmaz; tahmin üst sınıra yakındır.
+    """
+    requests = input_tokens = output_tokens = chunked = 0
+    packable_tokens = []
+
+    for essay_text in essay_texts:
+        essay_tokens = estimate_tokens(essay_text)
+        if essay_tokens > ESSAY_TOKEN_BUDGET:
+            section_count = math.ceil(essay_tokens / SECTION_TOKEN_BUDGET)
+            chunked += 1
+            requests += section_count + 1
+            input_tokens += essay_tokens + (section_count + 1) * prefix_tokens + section_count * SECTION_OUTPUT_TOKENS
+            output_tokens += section_count * SECTION_OUTPUT_TOKENS + EVALUATION_OUTPUT_TOKENS
+        elif pack_size > 1 and is_packable is not None and is_packable(essay_text):
+            packable_tokens.append(essay_tokens)
+        else:
+            requests += 1
+            input_tokens += prefix_tokens + essay_tokens
+            output_tokens += EVALUATION_OUTPUT_TOKENS
+
+    if packable_tokens:
+        pack_count = math.ceil(len(packable_tokens) / pack_size)
+        requests += pack_count
+        input_tokens += pack_count * prefix_tokens + sum(packable_tokens)
+        output_tokens += len(packable_tokens) * EVALUATION_OUTPUT_TOKENS
+
+    # Süre: eşzamanlı istek sayısı ile dakikalık istek kotasından yavaş olanı belirler
+    seconds = requests * GEMINI_AVG_LATENCY_SECONDS / max(1, max_workers)
+    if rpm_limit:
+        seconds = max(seconds, requests / rpm_limit * 60)
+
+    return {
+        "essays": len(essay_texts),
+        "requests": requests,
+        "chunked_essays": chunked,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cost": estimate_cost(input_tokens, output_tokens),
+        "seconds": seconds,
+    }